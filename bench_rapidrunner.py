@@ -0,0 +1,230 @@
+# Rapid Runner Benchmarks - headless hot-path timings under SDL's dummy video driver
+#
+#   python bench_rapidrunner.py --output bench.json              # run and save results
+#   python bench_rapidrunner.py --compare bench.json             # run and flag regressions vs a baseline
+#   python bench_rapidrunner.py --filter platform_surface        # run a subset (substring match)
+#   python bench_rapidrunner.py --check-reachability 300         # prove generated platforms reachable (real physics)
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Must be set before pygame initialises video
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pygame
+import rapidrunner as rr
+
+# --- Settings ---
+BENCH_SEED = 1234 # Every fixture is seeded so runs compare like with like
+DEFAULT_REPEATS = 7 # Timed repeats per case; the median is what gets compared
+DEFAULT_THRESHOLD = 0.10 # Relative slowdown of the median that counts as a regression
+RUN_FRAMES = 600 # Frames in the full-run cases (10 s of gameplay)
+RESTART_CYCLES = 2000 # Die/reset cycles in the restart memory case
+RESTART_MEMORY_LIMIT = 64 * 1024 # Retained bytes over RESTART_CYCLES that --compare treats as a leak (about 8-11 KB is normal)
+
+# --- Fixtures ---
+def make_platform_row(count, rng):
+    """count platforms laid out left to right across the screen, all under the player's feet height."""
+    platforms = pygame.sprite.Group(); x = 0; step = max(1, (rr.SCREEN_WIDTH * 2) // count)
+    for _ in range(count): platforms.add(rr.Platform(x, rng.randint(200, 500), rng.randint(rr.PLATFORM_MIN_WIDTH, rr.PLATFORM_MAX_WIDTH), rng)); x += step
+    return platforms
+
+def time_case(func, number, repeats):
+    """Per-call seconds for each repeat of number calls."""
+    times = []
+    for _ in range(repeats):
+        gc.collect(); start = time.perf_counter()
+        for _ in range(number): func()
+        times.append((time.perf_counter() - start) / number)
+    return times
+
+# --- Cases ---
+# Each case returns (callable, calls per repeat); the callable is timed, setup is not.
+def case_draw_sky(screen):
+    rr.draw_sky(screen)
+    return (lambda: rr.draw_sky(screen)), 200
+
+def case_sky_gradient_render(screen):
+    size = screen.get_size()
+    def render(): rr._sky_cache.pop(size, None); rr.get_sky_surface(size)
+    return render, 5
+
+def make_pose_case(pose_name, frame_index, dashing):
+    def case(screen):
+        player = rr.Player(); player.is_dashing = dashing; player._set_pose(pose_name, frame_index)
+        return player._update_image, 2000
+    return case
+
+def make_platform_surface_case(width):
+    def case(screen):
+        rng = random.Random(BENCH_SEED); platform_ = rr.Platform(0, 0, width, rng)
+        return (lambda: platform_._create_platform_surface(rng)), 50
+    return case
+
+def make_generate_case(speed):
+    def case(screen):
+        rng = random.Random(BENCH_SEED); reference = rr.Platform(200, rr.SCREEN_HEIGHT // 2, 120, rng); air_time = rr.calculate_max_air_time()
+        return (lambda: rr.generate_next_platform(reference, speed, air_time, rng)), 2000
+    return case
+
+def make_envelope_case(speed):
+    def case(screen): # generate_next_platform with the reachability envelope: a table lookup per spawn
+        rng = random.Random(BENCH_SEED); reference = rr.Platform(200, rr.SCREEN_HEIGHT // 2, 120, rng); envelope = rr.ReachabilityEnvelope.shared()
+        return (lambda: rr.generate_next_platform(reference, speed, None, rng, envelope)), 2000
+    return case
+
+def make_level_stream_case(speed):
+    def case(screen): # Amortised per-spawn cost of the chunked generator, segment refills included
+        reference = rr.Platform(200, rr.SCREEN_HEIGHT // 2, 120, random.Random(BENCH_SEED)); stream = rr.LevelStream(BENCH_SEED, rr.calculate_max_air_time())
+        return (lambda: stream.next_platform(reference, speed)), 2000
+    return case
+
+def make_collide_case(count):
+    def case(screen):
+        rng = random.Random(BENCH_SEED); player = rr.Player(); platforms = make_platform_row(count, rng)
+        return (lambda: pygame.sprite.spritecollide(player, platforms, False)), 2000
+    return case
+
+def make_track_collide_case(count):
+    def case(screen):
+        rng = random.Random(BENCH_SEED); player = rr.Player(); track = rr.PlatformTrack()
+        for platform_ in make_platform_row(count, rng): track.add(platform_)
+        return (lambda: track.collide(player)), 2000
+    return case
+
+def case_player_update(screen):
+    sim = rr.Simulation(BENCH_SEED); player = sim.player; platforms = sim.platforms
+    def update():
+        player.update(platforms)
+        if player.rect.top > rr.SCREEN_HEIGHT: player.reset()
+    return update, 2000
+
+def case_simulation_steps(screen):
+    def run():
+        sim = rr.Simulation(BENCH_SEED)
+        for frame in range(RUN_FRAMES):
+            if sim.step(rr.scripted_inputs(frame)): sim.reset(BENCH_SEED)
+    return run, 1
+
+def make_full_run_case(renderer_name):
+    def case(screen):
+        font = pygame.font.Font(None, 50)
+        def run(): # game_loop body minus the event pump and frame limiter
+            sim = rr.Simulation(BENCH_SEED); renderer = rr.RENDERERS[renderer_name](screen); renderer.invalidate()
+            for frame in range(RUN_FRAMES):
+                if sim.step(rr.scripted_inputs(frame)): sim.reset(BENCH_SEED); renderer.invalidate()
+                renderer.render(sim.all_sprites, [(rr.render_text(font, f"Score: {sim.display_score}", rr.BLACK), rr.HUD_POS)])
+        return run, 1
+    return case
+
+def make_render_frame_case(renderer_name):
+    def case(screen): # One renderer.render of a mid-run frame: blit cost alone, no physics
+        sim = rr.Simulation(BENCH_SEED); font = pygame.font.Font(None, 50); renderer = rr.RENDERERS[renderer_name](screen); renderer.invalidate()
+        for frame in range(120): sim.step(rr.scripted_inputs(frame))
+        hud_items = [(rr.render_text(font, f"Score: {sim.display_score}", rr.BLACK), rr.HUD_POS)]
+        return (lambda: renderer.render(sim.all_sprites, hud_items, 0.5)), 200
+    return case
+
+CASES = {"draw_sky": case_draw_sky, "sky_gradient_render": case_sky_gradient_render, "player_update": case_player_update, "simulation_600_steps": case_simulation_steps}
+for _pose, _frames in (("run", 4), ("jump_ascend", 1), ("jump_descend", 1), ("dash", 1)):
+    for _i in range(_frames): CASES[f"player_update_image[{_pose}:{_i}]"] = make_pose_case(_pose, _i, _pose == "dash")
+for _width in (90, 125, 160): CASES[f"platform_surface[{_width}]"] = make_platform_surface_case(_width)
+for _speed in (4, 8, 16, 32): CASES[f"generate_next_platform[speed={_speed}]"] = make_generate_case(_speed)
+if rr.np is not None:
+    for _speed in (4, 8, 16, 32): CASES[f"envelope_sample[speed={_speed}]"] = make_envelope_case(_speed)
+    for _speed in (4, 8, 16, 32): CASES[f"level_stream[speed={_speed}]"] = make_level_stream_case(_speed)
+for _count in (12, 120, 600): CASES[f"spritecollide[{_count}]"] = make_collide_case(_count) # Linear-scan reference
+for _count in (12, 120, 600): CASES[f"track_collide[{_count}]"] = make_track_collide_case(_count)
+for _name in sorted(rr.RENDERERS): CASES[f"render_frame[{_name}]"] = make_render_frame_case(_name)
+for _name in sorted(rr.RENDERERS): CASES[f"full_run_600[{_name}]"] = make_full_run_case(_name)
+
+# --- Memory ---
+def restart_memory(cycles=RESTART_CYCLES):
+    """Traced bytes retained after cycles of die + Simulation.reset(); should stay near zero."""
+    sim = rr.Simulation(BENCH_SEED)
+    def cycle():
+        frame = 0
+        while not sim.step(rr.scripted_inputs(frame)) and frame < RUN_FRAMES: frame += 1
+        sim.reset(BENCH_SEED)
+    for _ in range(20): cycle() # Warm caches/pools first
+    gc.collect(); tracemalloc.start(); base = tracemalloc.get_traced_memory()[0]
+    for _ in range(cycles): cycle()
+    gc.collect(); grown = tracemalloc.get_traced_memory()[0] - base; tracemalloc.stop()
+    return grown
+
+# --- Reachability ---
+def check_reachability(count, level_generator):
+    """Prints rapidrunner.unreachable_spawns for count platforms. Returns the number of unreachable platforms."""
+    failures = rr.unreachable_spawns(count, BENCH_SEED, level_generator)
+    if failures is None: print("No reachability envelope (needs NumPy or a cached table)"); return count
+    for speed, reference, platform_ in failures:
+        print(f"  speed {speed:6.2f}: " + (f"{platform_} unreachable from {reference}" if platform_ else f"no platform generated after {reference}"))
+    print(f"{level_generator:<8} {count - len(failures)}/{count} platforms proven reachable")
+    return len(failures)
+
+# --- Runner ---
+def run_benchmarks(name_filter=None, repeats=DEFAULT_REPEATS, memory=True):
+    pygame.init(); screen = pygame.display.set_mode((rr.SCREEN_WIDTH, rr.SCREEN_HEIGHT))
+    results = {}
+    for name, make_case in CASES.items():
+        if name_filter and name_filter not in name: continue
+        func, number = make_case(screen); times = time_case(func, number, repeats)
+        results[name] = {"median_s": statistics.median(times), "min_s": min(times), "calls": number, "repeats": repeats}
+        print(f"{name:<40} median {results[name]['median_s'] * 1e6:12.2f} us   min {results[name]['min_s'] * 1e6:12.2f} us")
+    if memory and (not name_filter or name_filter in "restart_memory"):
+        grown = restart_memory(); results["restart_memory"] = {"retained_bytes": grown, "cycles": RESTART_CYCLES}
+        print(f"{'restart_memory':<40} {grown} bytes retained over {RESTART_CYCLES} restarts")
+    pygame.quit()
+    return {"meta": {"python": platform.python_version(), "pygame": pygame.version.ver, "sdl": ".".join(map(str, pygame.get_sdl_version())),
+                     "machine": platform.machine(), "video_driver": os.environ.get("SDL_VIDEODRIVER"), "seed": BENCH_SEED}, "results": results}
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, memory_limit=RESTART_MEMORY_LIMIT):
+    """Names whose median got slower than baseline by more than threshold, with the ratio, plus restart_memory
+    (ratio to memory_limit) if it retained more than memory_limit bytes, whatever the baseline says."""
+    regressions = []
+    for name, result in current["results"].items():
+        if "retained_bytes" in result:
+            ratio = result["retained_bytes"] / memory_limit; marker = ""
+            if ratio > 1: regressions.append((name, ratio)); marker = "  <-- LEAK"
+            print(f"{name:<40} {result['retained_bytes']} bytes, {ratio:.2f}x of the {memory_limit} byte limit{marker}")
+            continue
+        base = baseline.get("results", {}).get(name)
+        if not base or "median_s" not in result or "median_s" not in base or base["median_s"] <= 0: continue
+        ratio = result["median_s"] / base["median_s"]; marker = ""
+        if ratio > 1 + threshold: regressions.append((name, ratio)); marker = "  <-- REGRESSION"
+        print(f"{name:<40} {ratio:6.2f}x{marker}")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rapid Runner hot-path benchmarks (headless)")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON to PATH")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved results JSON; exits 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown of the median before flagging (default 0.10)")
+    parser.add_argument("--filter", metavar="TEXT", help="only run cases whose name contains TEXT")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="timed repeats per case")
+    parser.add_argument("--no-memory", action="store_true", help="skip the restart memory case")
+    parser.add_argument("--check-reachability", type=int, metavar="N", help="instead of timing, prove N generated platforms per generator reachable; exits 1 on any failure")
+    args = parser.parse_args()
+
+    if args.check_reachability:
+        pygame.init(); pygame.display.set_mode((rr.SCREEN_WIDTH, rr.SCREEN_HEIGHT))
+        generators = [name for name in rr.LEVEL_GENERATORS if name != "chunked" or rr.np is not None]
+        failures = sum(check_reachability(args.check_reachability, name) for name in generators)
+        pygame.quit(); sys.exit(1 if failures else 0)
+
+    current = run_benchmarks(args.filter, args.repeats, not args.no_memory)
+    if args.output:
+        with open(args.output, "w") as f: json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions: print(f"{len(regressions)} regression(s): median over {args.threshold:.0%} slower or restart memory over {RESTART_MEMORY_LIMIT} bytes"); sys.exit(1)
+        print("No regressions")
@@ -0,0 +1,5 @@
+# Shared pytest setup: every test runs headless under SDL's dummy drivers
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Must be set before pygame initialises video, i.e. before the test modules import it
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -1,14 +1,34 @@
 # Full Code - Rapid Runner v8.1 (Indentation Fix & Full Code)
+#
+#   python rapidrunner.py --build-envelope   # once per change to the physics constants (~20 s, needs NumPy)
+#   python rapidrunner.py
+#
+# The game places platforms from the cached reachability envelope so every gap is provably jumpable; it never builds
+# one at startup, and without a cached table it falls back to the older air-time heuristic.
 
 import pygame
 import random
 import sys
+import os
 import math
+import json
+import hashlib
+import struct
+import time
+import csv
+from collections import OrderedDict, deque
+from itertools import islice
+
+try: import numpy as np # Optional: chunked level generation
+except ImportError: np = None
 
 # --- Constants ---
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60 # Default render rate cap
+PHYSICS_HZ = 60 # Fixed simulation tick rate, independent of render rate
+PHYSICS_DT = 1.0 / PHYSICS_HZ
+MAX_CATCHUP_STEPS = 5 # Physics steps allowed per rendered frame before dropping time (no spiral of death)
 
 # Player settings
 PLAYER_WIDTH = 30 # Base width for drawing calculations
@@ -37,35 +57,34 @@ PLATFORM_MAX_GAP_X = 200
 PLATFORM_MIN_GAP_Y = -125
 PLATFORM_MAX_GAP_Y = 110
 PLATFORM_REACH_MARGIN = 25 # How many pixels below basic jump trajectory the platform top can be
+MAX_LIVE_PLATFORMS = 12 # Spawn cap; dense/multi-lane modes raise it per Simulation
+LEVEL_CHUNK_SIZE = 16 # Platforms per vectorized level segment (with the envelope, offsets are still resolved per spawn)
+LEVEL_GENERATORS = ("scalar", "chunked") # generate_next_platform per spawn / LevelStream segments (needs NumPy)
+DEFAULT_LEVEL_GENERATOR = "chunked" if np is not None else "scalar"
+PLATFORM_TEXTURE_BUCKET = 16 # Width bucket for cached ground textures
+PLATFORM_TEXTURE_VARIANTS = 6 # Textures per bucket, enough that repeats aren't noticeable
+PLATFORM_TEXTURE_CACHE_SIZE = 64 # Max cached textures before LRU eviction
+TRACK_BISECT_MIN = 16 # PlatformTrack.collide bisects past platforms left of the player only above this many; a linear skip is cheaper below
+TEXT_CACHE_SIZE = 64 # Max cached rendered strings (HUD score, game over text) before LRU eviction
 
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
+# HUD
+HUD_POS = (10, 10)
+
 # --- Player Class ---
 class Player(pygame.sprite.Sprite):
-    def __init__(self):
+    def __init__(self, scale=1):
         super().__init__()
         self.base_width = PLAYER_WIDTH
         self.base_height = PLAYER_HEIGHT
-        self.image = pygame.Surface([self.base_width + 10, self.base_height + 10], pygame.SRCALPHA)
+        self.scale = scale # Sprite size multiplier, served from a per-scale PoseAtlas
+        self.image = pygame.Surface([int((self.base_width + 10) * scale), int((self.base_height + 10) * scale)], pygame.SRCALPHA)
         self.rect = self.image.get_rect(centerx=PLAYER_START_X, bottom=PLAYER_START_Y)
-
-        # Physics state
-        self.velocity_y = 0
-        self.on_ground = False
-        self.is_jumping = False
-        self.can_boost = False
-        self.has_boosted = False
-
-        # Dash state
-        self.is_dashing = False
-        self.dash_timer = 0
-
-        # Animation state
-        self.anim_frame = 0
-        self.anim_timer = 0
         self.current_pose = {} # Holds the polygon data for the current frame
+        self.pose_key = ("run", 0) # (pose name, frame index) of current_pose, used for atlas lookups
 
         # Define colors and body parts
         self.colors = {
@@ -83,7 +102,29 @@ class Player(pygame.sprite.Sprite):
         }
 
         self._define_anim_frames()
+        self.atlas = PoseAtlas.shared(self)
+        self.reset()
+
+    def reset(self):
+        """Puts the player back at the start position with fresh physics/animation state (reuses poses and atlas)."""
+        self.rect.centerx = PLAYER_START_X; self.rect.bottom = PLAYER_START_Y; self.prev_topleft = self.rect.topleft
+
+        # Physics state
+        self.velocity_y = 0
+        self.on_ground = False
+        self.is_jumping = False
+        self.can_boost = False
+        self.has_boosted = False
+
+        # Dash state
+        self.is_dashing = False
+        self.dash_timer = 0
+
+        # Animation state
+        self.anim_frame = 0
+        self.anim_timer = 0
         self._set_pose("run", 0) # Initial pose
+        self._update_image()
 
     def _define_anim_frames(self):
         """Defines polygon points for each body part in various animation poses."""
@@ -154,30 +195,12 @@ class Player(pygame.sprite.Sprite):
         return [self._rotate_point(p, center, angle_rad) for p in poly]
 
     def _set_pose(self, pose_name, frame_index):
-        try: self.current_pose = self.poses[pose_name][frame_index]
-        except (KeyError, IndexError): self.current_pose = self.poses["run"][0] # Fallback
+        try: self.current_pose = self.poses[pose_name][frame_index]; self.pose_key = (pose_name, frame_index)
+        except (KeyError, IndexError): self.current_pose = self.poses["run"][0]; self.pose_key = ("run", 0) # Fallback
 
-    def _update_image(self):
-        self.image.fill((0,0,0,0)) # Clear surface
-        if not self.current_pose: return
-
-        draw_order=["leg_upper_R","leg_lower_R","shoe_R","arm_upper_R","arm_lower_R","torso","leg_upper_L","leg_lower_L","shoe_L","arm_upper_L","arm_lower_L","head"]
-        if self.is_dashing:
-            trail_offset=8; trail_parts=["torso","leg_upper_L","leg_lower_L","leg_upper_R","leg_lower_R"]
-            for part_name in trail_parts:
-                 if part_name in self.current_pose:
-                     poly=[(p[0]-trail_offset,p[1]) for p in self.current_pose[part_name]]
-                     try: pygame.draw.polygon(self.image,self.colors["dash_trail"],poly)
-                     except ValueError: pass
-        for part_name in draw_order:
-            if part_name in self.current_pose and part_name in self.part_colors:
-                poly = self.current_pose[part_name]; color = self.part_colors[part_name]
-                try:
-                    int_poly = [(int(p[0]), int(p[1])) for p in poly]
-                    if len(int_poly)>=3: pygame.draw.polygon(self.image, color, int_poly)
-                except ValueError: pass
+    def _update_image(self): self.image = self.atlas.get(self.pose_key, self.is_dashing) # Swap in the pre-rendered pose
 
-    def update(self, platforms):
+    def update(self, platforms): # platforms: PlatformTrack
         # --- Handle Dash Timer ---
         if self.is_dashing:
             self.dash_timer -= 1
@@ -190,7 +213,7 @@ class Player(pygame.sprite.Sprite):
 
         # --- Collision Check ---
         self.on_ground=False
-        hit_list=pygame.sprite.spritecollide(self,platforms,False)
+        hit_list=platforms.collide(self)
         for p in hit_list:
             if self.velocity_y>=0 and self.rect.bottom<=p.rect.top+self.velocity_y+1:
                 self.rect.bottom=p.rect.top;self.velocity_y=0;self.on_ground=True
@@ -220,61 +243,605 @@ class Player(pygame.sprite.Sprite):
 
     def stop_jump(self): self.is_jumping = False # For variable jump height
 
-# --- Platform Class (Identical to v7) ---
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width):
-        super().__init__(); self.width=width; self.height=PLATFORM_HEIGHT
-        self.image=self._create_platform_surface(); self.rect=self.image.get_rect(topleft=(x,y))
-    def _create_platform_surface(self):
-        surf=pygame.Surface([self.width,self.height],pygame.SRCALPHA); rc=(110,100,90);gc=(0,150,0);gh=max(4,self.height//4)
-        pygame.draw.rect(surf,rc,(0,gh,self.width,self.height-gh))
-        for _ in range(int(self.width/10)): ly=random.randint(gh+2,self.height-3);sx=random.randint(0,self.width-5);ex=sx+random.randint(2,8);lcv=random.randint(-15,15);lc=tuple(max(0,min(255,c+lcv))for c in rc); pygame.draw.line(surf,lc,(sx,ly),(ex,ly),1)
-        pygame.draw.rect(surf,gc,(0,0,self.width,gh))
-        for _ in range(int(self.width/3)): bx=random.randint(0,self.width-1);bh=random.randint(3,7);bcg=random.randint(10,60);bcrb=random.randint(0,30);bc=(max(0,min(255,gc[0]+bcrb)),max(0,min(255,gc[1]+bcg)),max(0,min(255,gc[2]+bcrb))); pygame.draw.line(surf,bc,(bx,gh),(bx+random.randint(-1,1),gh-bh),random.choice([1,1,2]))
+# --- Display-Format Assets ---
+def display_format(surface, alpha=True, rle=False):
+    """Converts a surface to the display pixel format once so blits skip the per-pixel conversion.
+    Returned unchanged before set_mode (headless runs). rle: run-length encode a static alpha surface;
+    only blit it whole or with an area rect, since subsurfaces of an RLE surface take a slow path."""
+    if pygame.display.get_surface() is None: return surface
+    surface = surface.convert_alpha() if alpha else surface.convert()
+    if rle and alpha: surface.set_alpha(255, pygame.RLEACCEL) # 255 keeps the per-pixel alpha; None would drop it
+    return surface
+
+# --- Pose Atlas: Pre-rendered Player frames ---
+class PoseAtlas:
+    """One pre-rendered surface per (pose, frame, dashing) combination, so animating is a dict lookup."""
+    DRAW_ORDER = ["leg_upper_R","leg_lower_R","shoe_R","arm_upper_R","arm_lower_R","torso","leg_upper_L","leg_lower_L","shoe_L","arm_upper_L","arm_lower_L","head"]
+    TRAIL_PARTS = ["torso","leg_upper_L","leg_lower_L","leg_upper_R","leg_lower_R"]
+    TRAIL_OFFSET = 8
+    _shared = {} # scale -> PoseAtlas, reused by every Player so restarts don't rebuild it
+
+    @classmethod
+    def shared(cls, player):
+        atlas = cls._shared.get(player.scale)
+        if atlas is None: atlas = cls._shared[player.scale] = cls(player.poses, player.part_colors, player.colors["dash_trail"], player.image.get_size(), player.scale)
+        elif not atlas.display_ready: atlas.to_display_format() # Built headless (e.g. by the envelope) before the window opened
+        return atlas
+
+    def __init__(self, poses, part_colors, trail_color, size, scale=1):
+        self.scale = scale; self.surfaces = {}
+        for pose_name, frames in poses.items():
+            for frame_index, pose in enumerate(frames):
+                for dashing in (False, True): self.surfaces[(pose_name, frame_index, dashing)] = self._render(pose, part_colors, trail_color, size, dashing)
+        self.to_display_format()
+
+    def to_display_format(self):
+        self.display_ready = pygame.display.get_surface() is not None
+        if self.display_ready: self.surfaces = {key: display_format(surf, rle=True) for key, surf in self.surfaces.items()}
+
+    def _render(self, pose, part_colors, trail_color, size, dashing):
+        surf = pygame.Surface(size, pygame.SRCALPHA); k = self.scale
+        if dashing:
+            for part_name in self.TRAIL_PARTS:
+                if part_name in pose:
+                    poly=[((p[0]-self.TRAIL_OFFSET)*k,p[1]*k) for p in pose[part_name]]
+                    try: pygame.draw.polygon(surf,trail_color,poly)
+                    except ValueError: pass
+        for part_name in self.DRAW_ORDER:
+            if part_name in pose and part_name in part_colors:
+                int_poly = [(int(p[0]*k), int(p[1]*k)) for p in pose[part_name]]
+                try:
+                    if len(int_poly)>=3: pygame.draw.polygon(surf, part_colors[part_name], int_poly)
+                except ValueError: pass
         return surf
-    def update(self, current_speed): # <-- FIXED INDENTATION HERE
-        self.rect.x -= current_speed
-        if self.rect.right < 0:
-            self.kill()
 
-# --- Helper: Draw Sky (Identical to v7) ---
-def draw_sky(screen): tc=(100,180,255);bc=(220,240,255);h=screen.get_height();w=screen.get_width(); [pygame.draw.line(screen,tuple(int(tc[c]*(1-(i/h))+bc[c]*(i/h)) for c in range(3)),(0,i),(w,i)) for i in range(h)]
+    def get(self, pose_key, dashing):
+        return self.surfaces.get((pose_key[0], pose_key[1], dashing)) or self.surfaces[("run", 0, dashing)]
+
+# --- Platform Class (Pooled, cached textures) ---
+def create_platform_texture(width, height, rng=random): # rng: texture stream, kept apart from level generation
+    surf=pygame.Surface([width,height],pygame.SRCALPHA); rc=(110,100,90);gc=(0,150,0);gh=max(4,height//4)
+    pygame.draw.rect(surf,rc,(0,gh,width,height-gh))
+    for _ in range(int(width/10)): ly=rng.randint(gh+2,height-3);sx=rng.randint(0,width-5);ex=sx+rng.randint(2,8);lcv=rng.randint(-15,15);lc=tuple(max(0,min(255,c+lcv))for c in rc); pygame.draw.line(surf,lc,(sx,ly),(ex,ly),1)
+    pygame.draw.rect(surf,gc,(0,0,width,gh))
+    for _ in range(int(width/3)): bx=rng.randint(0,width-1);bh=rng.randint(3,7);bcg=rng.randint(10,60);bcrb=rng.randint(0,30);bc=(max(0,min(255,gc[0]+bcrb)),max(0,min(255,gc[1]+bcg)),max(0,min(255,gc[2]+bcrb))); pygame.draw.line(surf,bc,(bx,gh),(bx+rng.randint(-1,1),gh-bh),rng.choice([1,1,2]))
+    return surf
+
+class Platform(pygame.sprite.Sprite):
+    """A scrolling ground segment. image is usually a shared PlatformTextureCache texture up to
+    PLATFORM_TEXTURE_BUCKET - 1 px wider than rect, cropped only by source_rect: draw it with blit_item's area.
+    Group.draw, or masks built from image, would draw or collide with the overhang past rect.right."""
+    def __init__(self, x, y, width, rng=random, textures=None):
+        super().__init__()
+        self.reset(x, y, width, rng, textures)
+    def reset(self, x, y, width, rng=random, textures=None):
+        self.width=width; self.height=PLATFORM_HEIGHT
+        self.image=textures.get(width, rng) if textures else self._create_platform_surface(rng); self.rect=pygame.Rect(x,y,width,self.height)
+        self.source_rect=pygame.Rect(0,0,width,self.height) # Crop of image to blit: cached textures are wider than the platform
+        self.prev_topleft=self.rect.topleft # Render interpolation start point; spawned sprites don't slide in
+    def _create_platform_surface(self, rng=random): return create_platform_texture(self.width, self.height, rng)
+
+class PlatformTextureCache:
+    """Bounded LRU of pre-generated ground textures keyed by (width bucket, variant).
+    Textures are rendered at the bucket's widest size in RLE display format; platforms crop them with source_rect at blit time."""
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None: cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, max_entries=PLATFORM_TEXTURE_CACHE_SIZE, variants=PLATFORM_TEXTURE_VARIANTS, bucket=PLATFORM_TEXTURE_BUCKET):
+        self.max_entries = max_entries; self.variants = variants; self.bucket = bucket
+        self.textures = OrderedDict() # (bucket width, variant) -> Surface, least recently used first
+
+    def get(self, width, rng=random):
+        bucket_width = -(-width // self.bucket) * self.bucket # Round up so the crop always fits
+        key = (bucket_width, rng.randrange(self.variants))
+        texture = self.textures.get(key)
+        if texture is None:
+            texture = self.textures[key] = display_format(create_platform_texture(bucket_width, PLATFORM_HEIGHT, rng), rle=True)
+            if len(self.textures) > self.max_entries: self.textures.popitem(last=False)
+        else: self.textures.move_to_end(key)
+        return texture
+
+class PlatformPool:
+    """Recycles platforms PlatformTrack.scroll culls off-screen instead of building a new sprite (and surface) per spawn."""
+    def __init__(self, textures=None):
+        self.textures = textures if textures is not None else PlatformTextureCache.shared(); self.free = []
+    def acquire(self, x, y, width, rng=random):
+        if self.free: platform = self.free.pop(); platform.reset(x, y, width, rng, self.textures)
+        else: platform = Platform(x, y, width, rng, self.textures)
+        return platform
+    def release(self, platform): self.free.append(platform)
+
+class PlatformTrack:
+    """Live platforms in a deque ordered by rect.left. Everything scrolls left at the same speed, so the order
+    never changes: spawns append on the right, culling pops off the left and collision queries only walk
+    the platforms overlapping the queried x-span."""
+    def __init__(self): self.platforms = deque(); self.max_width = 0 # Widest platform added since the last clear
+    def __len__(self): return len(self.platforms)
+    def __iter__(self): return iter(self.platforms)
+
+    def add(self, platform):
+        platforms = self.platforms; i = len(platforms)
+        while i and platforms[i - 1].rect.left > platform.rect.left: i -= 1 # Usually 0 steps: spawns arrive in order
+        platforms.insert(i, platform); self.max_width = max(self.max_width, platform.rect.width)
+
+    def clear(self): self.platforms.clear(); self.max_width = 0
+
+    def scroll(self, speed):
+        """Moves every platform left by speed and returns the ones that left the screen (popped from the front)."""
+        for platform in self.platforms: platform.rect.x -= speed
+        culled = []; platforms = self.platforms
+        while platforms and platforms[0].rect.right < 0: culled.append(platforms.popleft())
+        return culled
+
+    def collide(self, sprite):
+        """Platforms whose rect overlaps sprite.rect, checking only those in its x-span. Anything starting more than
+        max_width left of the sprite ends before it, so the scan starts at a bisect past those."""
+        rect = sprite.rect; left = rect.left; right = rect.right; hits = []; platforms = self.platforms
+        start = 0
+        if len(platforms) > TRACK_BISECT_MIN: # Hand-rolled bisect_left on rect.left: bisect's key= needs Python 3.10
+            target = left - self.max_width; end = len(platforms)
+            while start < end:
+                mid = (start + end) // 2
+                if platforms[mid].rect.left < target: start = mid + 1
+                else: end = mid
+        for platform in islice(platforms, start, None):
+            p_rect = platform.rect
+            if p_rect.left >= right: break # Sorted by left: nothing further can overlap
+            if p_rect.right > left and p_rect.colliderect(rect): hits.append(platform)
+        return hits
+
+# --- Helper: Draw Sky (Cached gradient) ---
+_sky_cache = {} # (width, height) -> pre-rendered gradient surface
+
+def get_sky_surface(size):
+    """Returns the sky gradient for a screen size, rendering it only the first time."""
+    sky = _sky_cache.get(size)
+    if sky is None:
+        tc=(100,180,255);bc=(220,240,255);w,h=size; sky=pygame.Surface((w,h))
+        for i in range(h): pygame.draw.line(sky,tuple(int(tc[c]*(1-(i/h))+bc[c]*(i/h)) for c in range(3)),(0,i),(w,i))
+        _sky_cache[size] = sky = display_format(sky, alpha=False)
+    return sky
+
+def draw_sky(screen): screen.blit(get_sky_surface(screen.get_size()), (0, 0))
+
+# --- Helper: Text Cache ---
+class TextCache:
+    """Bounded LRU of rendered strings keyed by (font, text, color), kept in RLE display format.
+    The score only changes every few ticks, so most frames are a dict hit instead of a font.render."""
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None: cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries; self.surfaces = OrderedDict() # (font, text, color) -> Surface, least recently used first
+
+    def render(self, font, text, color):
+        key = (font, text, color); surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = display_format(font.render(text, True, color), rle=True)
+            if len(self.surfaces) > self.max_entries: self.surfaces.popitem(last=False)
+        else: self.surfaces.move_to_end(key)
+        return surface
+
+def render_text(font, text, color): return TextCache.shared().render(font, text, color)
+
+# --- Renderers ---
+def interpolated_topleft(sprite, alpha):
+    """Sprite position blended between its previous and current physics tick (alpha in [0, 1])."""
+    x, y = sprite.rect.topleft; px, py = getattr(sprite, "prev_topleft", (x, y))
+    return round(px + (x - px) * alpha), round(py + (y - py) * alpha)
+
+def blit_item(sprite, alpha):
+    """Surface.blits entry for a sprite: (image, interpolated position, source area or None for the whole image)."""
+    return sprite.image, interpolated_topleft(sprite, alpha), getattr(sprite, "source_rect", None)
+
+class FlipRenderer:
+    """Redraws the whole screen every frame and presents it with display.flip()."""
+    def __init__(self, screen): self.screen = screen; self.profiler = None
+    def invalidate(self): pass # Every frame is a full redraw already
+    def render(self, all_sprites, hud_items, alpha=1.0): # hud_items: [(surface, pos), ...] drawn over the sprites
+        screen = self.screen; prof = self.profiler
+        draw_sky(screen)
+        if prof: prof.lap("sky")
+        screen.blits([blit_item(sprite, alpha) for sprite in all_sprites] + hud_items, False) # One batch for sprites and HUD
+        if prof: prof.lap("sprites")
+        pygame.display.flip()
+        if prof: prof.lap("present")
+
+class DirtyRectRenderer:
+    """Restores only the regions sprites and the HUD moved through and pushes them with display.update(rects)."""
+    def __init__(self, screen):
+        self.screen = screen; self.background = get_sky_surface(screen.get_size()); self.profiler = None
+        self.drawn_rects = []; self.needs_full_redraw = True # Rects drawn last frame, restored from the sky next frame
+    def invalidate(self): self.needs_full_redraw = True # Call after anything else drew over the screen
+    def render(self, all_sprites, hud_items, alpha=1.0): # hud_items: [(surface, pos), ...] drawn over the sprites
+        screen = self.screen; bg = self.background; dirty = self.drawn_rects; prof = self.profiler
+        if self.needs_full_redraw: screen.blit(bg, (0, 0))
+        else: screen.blits([(bg, rect, rect) for rect in dirty], False)
+        if prof: prof.lap("sky")
+        drawn = screen.blits([blit_item(sprite, alpha) for sprite in all_sprites] + hud_items) # One batch, returns the drawn rects
+        if prof: prof.lap("sprites")
+        if self.needs_full_redraw: pygame.display.flip(); self.needs_full_redraw = False
+        else: pygame.display.update(dirty + drawn)
+        self.drawn_rects = drawn
+        if prof: prof.lap("present")
+
+RENDERERS = {"flip": FlipRenderer, "dirty": DirtyRectRenderer}
+
+# --- Frame Profiler ---
+PROFILE_PHASES = ("events", "player_update", "platforms_update", "spawn", "font", "sky", "sprites", "present")
+PROFILE_CAPACITY = 600 # Frames kept in the ring buffer (10 s at 60 FPS)
+PROFILE_OVERLAY_REFRESH = 30 # Frames between overlay text re-renders
+PROFILE_OVERLAY_KEY = pygame.K_F3
 
-# --- Helper: Calculate Max Air Time (Identical to v7) ---
+class FrameProfiler:
+    """Times each phase of a frame into a fixed-size ring buffer. Instrumented code holds the profiler
+    in a local and guards every lap with `if prof:`, so with profiling off the cost is one truthiness check."""
+    def __init__(self, capacity=PROFILE_CAPACITY):
+        self.capacity = capacity; self.index = 0; self.count = 0
+        self.samples = {phase: [0.0] * capacity for phase in PROFILE_PHASES} # Seconds per phase per frame
+        self.current = dict.fromkeys(PROFILE_PHASES, 0.0); self.mark = time.perf_counter()
+        self.show_overlay = False; self.overlay = None; self.overlay_age = 0
+        self.csv_path = None # game_loop dumps the buffered frames here on exit
+
+    def begin_frame(self):
+        for phase in self.current: self.current[phase] = 0.0
+        self.mark = time.perf_counter()
+
+    def lap(self, phase): # Charges the time since the previous lap/begin_frame to phase
+        now = time.perf_counter(); self.current[phase] += now - self.mark; self.mark = now
+
+    def end_frame(self):
+        i = self.index
+        for phase, elapsed in self.current.items(): self.samples[phase][i] = elapsed
+        self.index = (i + 1) % self.capacity; self.count = min(self.count + 1, self.capacity)
+
+    def frames(self):
+        """Buffered frames oldest first, as {phase: seconds} dicts."""
+        start = (self.index - self.count) % self.capacity
+        return [{phase: self.samples[phase][(start + n) % self.capacity] for phase in PROFILE_PHASES} for n in range(self.count)]
+
+    def percentiles(self, pcts=(50, 95, 99)):
+        """{phase: [milliseconds at each percentile]} over the buffered frames."""
+        result = {}
+        for phase in PROFILE_PHASES:
+            data = sorted(self.samples[phase][:self.count]) # Slots fill from 0, so the first count are valid
+            result[phase] = [data[min(len(data) - 1, int(len(data) * p / 100))] * 1000 if data else 0.0 for p in pcts]
+        return result
+
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f); writer.writerow(["frame"] + [f"{phase}_ms" for phase in PROFILE_PHASES] + ["total_ms"])
+            for n, frame in enumerate(self.frames()):
+                writer.writerow([n] + [f"{frame[phase] * 1000:.4f}" for phase in PROFILE_PHASES] + [f"{sum(frame.values()) * 1000:.4f}"])
+
+    def overlay_item(self, font, screen_width):
+        """(surface, pos) HUD item with p50/p95/p99 per phase, re-rendered every PROFILE_OVERLAY_REFRESH frames."""
+        self.overlay_age -= 1
+        if self.overlay is None or self.overlay_age <= 0:
+            lines = [f"{'phase':<16}{'p50':>7}{'p95':>7}{'p99':>7} ms"]
+            lines += [f"{phase:<16}" + "".join(f"{v:7.2f}" for v in values) for phase, values in self.percentiles().items()]
+            rows = [font.render(line, True, BLACK) for line in lines]
+            self.overlay = pygame.Surface((max(r.get_width() for r in rows) + 8, sum(r.get_height() for r in rows) + 8), pygame.SRCALPHA)
+            self.overlay.fill((255, 255, 255, 170)); y = 4
+            for r in rows: self.overlay.blit(r, (4, y)); y += r.get_height()
+            self.overlay = display_format(self.overlay); self.overlay_age = PROFILE_OVERLAY_REFRESH
+        return self.overlay, (screen_width - self.overlay.get_width() - 10, 10)
+
+# --- Helper: Calculate Max Air Time (Fallback when no ReachabilityEnvelope is available) ---
 def calculate_max_air_time():
     if PLAYER_GRAVITY<=0: return float('inf')
     biv=PLAYER_JUMP_STRENGTH+PLAYER_BOOST_STRENGTH; t_pb=-biv/PLAYER_GRAVITY if PLAYER_GRAVITY>0 else 0; t_pb=max(0,t_pb)
     mth=(biv*t_pb)+(0.5*PLAYER_GRAVITY*t_pb**2) if t_pb>0 else 0; fd=abs(mth)+PLATFORM_MAX_GAP_Y; fd=max(0,fd)
     t_f=math.sqrt(2*fd/PLAYER_GRAVITY) if PLAYER_GRAVITY>0 else 0; return (t_pb+t_f)*1.15
 
-# --- Helper: Show Game Over Screen (Identical to v7) ---
-def show_game_over_screen(screen, font, score):
-    sw,sh=screen.get_size();ov=pygame.Surface((sw,sh),pygame.SRCALPHA);ov.fill((0,0,0,180));screen.blit(ov,(0,0))
+# --- Reachability Envelope ---
+# A jump strategy is (hold, boost, boost_release): SPACE goes down on step 1 and up on step hold + 1
+# (hold None = never released, hold 0 = no jump: walk off the edge), then optionally down again on
+# step boost for the dash/boost and up on step boost_release (None = held). Steps count
+# Simulation.step calls from the takeoff.
+#
+# How reachability is proven. Let e = reference.right - player.left at takeoff (e <= 0: the player walked off the edge).
+# A strategy whose landing step comes after the platforms scrolled x_land px lands on a target gap px further on iff
+# t = e + gap is in [t_lo, t_hi]: the player still overlaps the target then, and was never beside it while below its top.
+# The scroll moves e in steps of lattice = platform_move(speed), so the player only stands at e = 1 - lattice + phase + k * lattice
+# for one phase in [0, lattice); a target is reachable only if every phase has a landing, walking off at its one e <= 0
+# or jumping from one of its e >= 1. Landings only count if they leave at least ENVELOPE_LANDING_MARGIN px of the target
+# under the player, and jumps only start from e <= ENVELOPE_LANDING_MARGIN - lattice, which every such landing still
+# reaches: so pairwise proofs chain from platform to platform. _reach_matrix tabulates this per speed bucket,
+# find_landing replays it with the real physics, and sweep_rapidrunner.GreedyBot ranks strategies with the same t windows.
+ENVELOPE_VERSION = 2
+ENVELOPE_LANDING_MARGIN = 45 # At least one step of scroll at ENVELOPE_MAX_SPEED, or the top buckets come out empty
+ENVELOPE_SPEED_STEP = 0.5 # Speed bucket width
+ENVELOPE_MAX_SPEED = 40.0 # Faster speeds use the last bucket
+ENVELOPE_MAX_HOLD = 25 # Longest finite hold tabulated (about the time to apex)
+ENVELOPE_MAX_BOOST_STEP = 60 # Latest boost press tabulated
+ENVELOPE_MAX_STEPS = 240 # Integration cap per strategy
+ENVELOPE_SAFE_BUCKETS = 3 # New platforms must leave a way on at this many upcoming speed buckets
+ENVELOPE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rapidrunner_cache") # Read at call time; "" keeps envelopes in memory only
+
+def envelope_strategies():
+    strategies = [(None, None, None)]
+    for hold in range(0, ENVELOPE_MAX_HOLD + 1):
+        strategies.append((hold, None, None))
+        for boost in range(hold + 1, ENVELOPE_MAX_BOOST_STEP + 1): strategies += [(hold, boost, boost + 1), (hold, boost, None)]
+    return strategies
+
+def strategy_inputs(strategy, step):
+    hold, boost, boost_release = strategy; inputs = []
+    if step == 1 and hold != 0: inputs.append(INPUT_JUMP)
+    if hold and step == hold + 1: inputs.append(INPUT_STOP_JUMP)
+    if boost is not None and step == boost: inputs.append(INPUT_JUMP)
+    if boost_release is not None and step == boost_release: inputs.append(INPUT_STOP_JUMP)
+    return inputs
+
+def _apply_inputs(player, inputs):
+    for code in inputs:
+        if code == INPUT_JUMP: player.jump()
+        elif code == INPUT_STOP_JUMP: player.stop_jump()
+
+def integrate_strategy(strategy, player=None):
+    """Runs the real Player.update with no platforms, ordered like Simulation.step.
+    Returns per-step lists (index 0 = standing before takeoff): bottom offset from the takeoff surface,
+    velocity_y after the step, and whether that step scrolled at dash speed."""
+    player = player or Player(); player.reset(); player.on_ground = player.can_boost = True; empty = PlatformTrack() # As after landing
+    start = player.rect.bottom; bottoms = [0]; velocities = [0.0]; dashing = [False]
+    for step in range(1, ENVELOPE_MAX_STEPS + 1):
+        _apply_inputs(player, strategy_inputs(strategy, step))
+        dashing.append(player.is_dashing) # Simulation picks the scroll speed after inputs, before update
+        player.update(empty)
+        bottoms.append(player.rect.bottom - start); velocities.append(player.velocity_y)
+        if bottoms[-1] > PLATFORM_MAX_GAP_Y and player.velocity_y > 0: break # Below every tabulated target
+    return bottoms, velocities, dashing
+
+def integrate_strategies(strategies, player=None):
+    """integrate_strategy for every strategy as (strategies, steps) arrays (bottoms, velocities, dashing), padded past
+    each trajectory's end with bottoms far below every target, velocity 0 and no dash, so nothing lands there."""
+    player = player or Player(); trajectories = [integrate_strategy(strategy, player) for strategy in strategies]
+    shape = (len(trajectories), max(len(t[0]) for t in trajectories))
+    bottoms = np.full(shape, 10**6); velocities = np.zeros(shape); dashing = np.zeros(shape, dtype=bool)
+    for s, (b, v, d) in enumerate(trajectories): bottoms[s, :len(b)] = b; velocities[s, :len(v)] = v; dashing[s, :len(d)] = d
+    return bottoms, velocities, dashing
+
+def landing_steps(bottoms, velocities, dy, snap=False):
+    """Per strategy, for a platform top at offset dy from the takeoff surface: the first step that lands on it
+    (or -1) and the last earlier step spent below it (or -1). The envelope only counts landings falling in from
+    above; snap=True also counts Player.update's snap up from at most velocity_y + 1 px below the top."""
+    b0 = bottoms[:, :-1]; b1 = bottoms[:, 1:]; v1 = velocities[:, 1:]
+    crossing = (b1 > dy) & (v1 >= 0) & (b1 <= dy + v1 + 1) # Player.update's landing test
+    if not snap: crossing &= b0 <= dy
+    has = crossing.any(axis=1); first = crossing.argmax(axis=1) + 1
+    last_below = np.maximum.accumulate(np.where(bottoms > dy, np.arange(bottoms.shape[1]), -1), axis=1) # Last step at or before i spent below dy
+    below = last_below[np.arange(len(bottoms)), first - 1]
+    return np.where(has, first, -1), np.where(has, below, -1)
+
+def scroll_shift(dashing, speed):
+    """(strategies, steps) pixels the platforms have scrolled when step i's collision check runs (the scroll comes
+    after it), for a takeoff whose first step runs at base speed speed and ramps like Simulation.step."""
+    base = [speed + PLATFORM_SPEED_INCREASE * (i - 1) for i in range(dashing.shape[1])] # Step i runs after i - 1 ramps
+    plain = np.array([0] + [platform_move(b) for b in base[1:]]); dash = np.array([0] + [platform_move(b + PLAYER_DASH_SPEED_BONUS) for b in base[1:]])
+    moved = np.cumsum(np.where(dashing, dash, plain), axis=1)
+    shift = np.zeros_like(moved); shift[:, 1:] = moved[:, :-1]; return shift
+
+def platform_move(speed):
+    """Pixels a platform actually moves in one step at speed (rect.x is an int, so the float is rounded)."""
+    probe = pygame.Rect(0, 0, 1, 1); probe.x -= speed; return -probe.x
+
+class ReachabilityEnvelope:
+    """Per speed bucket and integer gap, the runs [(dy_lo, dy_hi), ...] of platform-top offsets the player provably lands on.
+    Built from the real Player physics (see the notes above ENVELOPE_VERSION) and cached as JSON; lookups are table reads."""
+    _shared = {} # Physics key -> envelope, for the current key only: sweep workers move through many configs
+
+    def __init__(self, data):
+        self.key = data["key"]; self.speed_start = data["speed_start"]; self.speed_step = data["speed_step"]
+        self.runs = [[[tuple(run) for run in gap_runs] for gap_runs in bucket_runs] for bucket_runs in data["runs"]] # [bucket][gap] -> [(lo, hi), ...]
+        self.valid_gaps = [[g for g in range(PLATFORM_MIN_GAP_X, PLATFORM_MAX_GAP_X + 1) if bucket_runs[g]] for bucket_runs in self.runs]
+        # Tops from which some gap still has an on-screen reachable offset, at this bucket and the next few (no dead ends)
+        y_min = PLATFORM_HEIGHT * 3; y_max = SCREEN_HEIGHT - PLATFORM_HEIGHT * 4; exits = []
+        for bucket_runs, gaps in zip(self.runs, self.valid_gaps):
+            exits.append((y_min - max(bucket_runs[g][-1][1] for g in gaps), y_max - min(bucket_runs[g][0][0] for g in gaps)) if gaps else (y_max + 1, y_min - 1))
+        self.safe_y = [(max(e[0] for e in exits[b:b + ENVELOPE_SAFE_BUCKETS]), min(e[1] for e in exits[b:b + ENVELOPE_SAFE_BUCKETS])) for b in range(len(exits))]
+
+    @staticmethod
+    def physics_key():
+        names = ("SCREEN_WIDTH", "SCREEN_HEIGHT", "PLAYER_WIDTH", "PLAYER_HEIGHT", "PLAYER_GRAVITY", "PLAYER_JUMP_STRENGTH", "PLAYER_JUMP_CUTOFF_MULTIPLIER",
+                 "PLAYER_BOOST_STRENGTH", "PLAYER_MAX_FALL_SPEED", "PLAYER_START_X", "PLAYER_DASH_DURATION_FRAMES", "PLAYER_DASH_SPEED_BONUS",
+                 "PLATFORM_MIN_WIDTH", "PLATFORM_START_SPEED", "PLATFORM_SPEED_INCREASE", "PLATFORM_MIN_GAP_X", "PLATFORM_MAX_GAP_X",
+                 "PLATFORM_MIN_GAP_Y", "PLATFORM_MAX_GAP_Y", "ENVELOPE_VERSION", "ENVELOPE_LANDING_MARGIN", "ENVELOPE_SPEED_STEP", "ENVELOPE_MAX_SPEED",
+                 "ENVELOPE_MAX_HOLD", "ENVELOPE_MAX_BOOST_STEP", "ENVELOPE_MAX_STEPS")
+        values = json.dumps([globals()[name] for name in names])
+        return hashlib.sha1(values.encode()).hexdigest()[:16]
+
+    @classmethod
+    def shared(cls, cache_dir=None, build=True):
+        """The envelope for the current constants: memory, then disk cache, then built (needs NumPy) unless build=False.
+        None if unavailable. cache_dir defaults to ENVELOPE_CACHE_DIR. A build takes seconds and its JSON is a few hundred KB."""
+        key = cls.physics_key(); cache_dir = ENVELOPE_CACHE_DIR if cache_dir is None else cache_dir
+        if key not in cls._shared:
+            envelope = cls.load_or_build(key, cache_dir, build)
+            if envelope is None and build is False: return None # Not cached yet: a later build=True call may still build it
+            cls._shared = {key: envelope} # Drops the previous config's table
+        return cls._shared[key]
+
+    @classmethod
+    def load_or_build(cls, key, cache_dir, build=True):
+        path = os.path.join(cache_dir, f"reach_envelope_{key}.json") if cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f: data = json.load(f)
+                if data.get("key") == key: return cls(data)
+            except (OSError, ValueError) as e: print(f"Ignoring unreadable reachability cache {path}: {e}")
+        if np is None or not build: return None # Caller falls back to the calculate_max_air_time heuristic
+        data = build_envelope_data(key)
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True); partial = f"{path}.{os.getpid()}.tmp" # Atomic: sweep workers may race on the same key
+                with open(partial, "w") as f: json.dump(data, f, separators=(",", ":"))
+                os.replace(partial, path)
+            except OSError as e: print(f"Could not cache reachability envelope at {path}: {e}")
+        return cls(data)
+
+    def bucket(self, speed): return max(0, min(len(self.runs) - 1, int((speed - self.speed_start) / self.speed_step)))
+
+    def offset_runs(self, bucket, gap, reference_y, safe=True):
+        """Reachable dy runs for a gap, narrowed so the new platform stays inside the screen clamp
+        and, when safe, inside safe_y so the platform after it can still be placed."""
+        y_min, y_max = self.safe_y[bucket] if safe else (PLATFORM_HEIGHT * 3, SCREEN_HEIGHT - PLATFORM_HEIGHT * 4)
+        lo = max(PLATFORM_HEIGHT * 3, y_min) - reference_y; hi = min(SCREEN_HEIGHT - PLATFORM_HEIGHT * 4, y_max) - reference_y
+        return [(max(run_lo, lo), min(run_hi, hi)) for run_lo, run_hi in self.runs[bucket][gap] if run_lo <= hi and run_hi >= lo]
+
+    def offset_at(self, bucket, gap, reference_y, quantile):
+        """The quantile-th (0 <= quantile < 1) reachable on-screen offset for gap, or None if there is none."""
+        for safe in (True, False): # safe_y is dropped as a last resort
+            runs = self.offset_runs(bucket, gap, reference_y, safe)
+            if runs: break
+        else: return None
+        index = int(quantile * sum(hi - lo + 1 for lo, hi in runs))
+        for lo, hi in runs:
+            if index <= hi - lo: return lo + index
+            index -= hi - lo + 1
+        return runs[-1][1]
+
+    def sample(self, reference_rect, speed, rng=random, gap=None, quantile=None, width=None):
+        """(x, y, width) for a provably reachable next platform; integer gap and offset so rects land exactly.
+        gap, quantile and width are drawn from rng unless given. If the gap has no offset on screen, the nearest gap that does is used."""
+        bucket = self.bucket(speed); valid_gaps = self.valid_gaps[bucket]
+        if not valid_gaps: return None
+        if gap is None: gap = valid_gaps[rng.randrange(len(valid_gaps))]
+        if quantile is None: quantile = rng.random()
+        if width is None: width = rng.randint(PLATFORM_MIN_WIDTH, PLATFORM_MAX_WIDTH)
+        offset_y = self.offset_at(bucket, gap, reference_rect.y, quantile)
+        if offset_y is not None: return reference_rect.right + gap, reference_rect.y + offset_y, width
+        for candidate in sorted(valid_gaps, key=lambda g: abs(g - gap)):
+            offset_y = self.offset_at(bucket, candidate, reference_rect.y, quantile)
+            if offset_y is not None: return reference_rect.right + candidate, reference_rect.y + offset_y, width
+        return None
+
+    def is_reachable(self, reference_rect, target_rect, speed):
+        gap = target_rect.left - reference_rect.right; dy = target_rect.y - reference_rect.y
+        return 0 <= gap <= PLATFORM_MAX_GAP_X and any(lo <= dy <= hi for lo, hi in self.runs[self.bucket(speed)][gap])
+
+def _landing_tables(bottoms, velocities, dys):
+    """landing_steps for every target offset in dys, as (strategies, dys) int arrays."""
+    land = np.full((len(bottoms), len(dys)), -1); below = np.full_like(land, -1)
+    for d, dy in enumerate(dys.tolist()): land[:, d], below[:, d] = landing_steps(bottoms, velocities, dy)
+    return land, below
+
+def _reach_matrix(dashing, walk_off, land, below, dys, speed):
+    """(dys, gaps) bool: whether a PLATFORM_MIN_WIDTH platform at that gap and offset is reachable at base speed speed."""
+    gaps = PLATFORM_MAX_GAP_X + 1; shift = scroll_shift(dashing, speed)
+    pw = Player().rect.width; w = PLATFORM_MIN_WIDTH
+    rows = np.arange(len(dashing))[:, None]; valid = land >= 0
+    x_land = shift[rows, np.maximum(land, 0)]
+    x_below = np.where(below >= 0, shift[rows, np.maximum(below, 0)], -10**6)
+    # Each strategy's t = e + gap window
+    t_lo = np.maximum(x_below + pw, x_land - w + ENVELOPE_LANDING_MARGIN); t_hi = x_land + pw - 1; valid &= t_lo <= t_hi # Lands with t + w - x_land px under the player
+    # Union of those t intervals per dy, separately for jumps and walk-offs (difference arrays over t)
+    lattice = platform_move(speed); e_max = ENVELOPE_LANDING_MARGIN - lattice; t_size = gaps + e_max + 1; offset = lattice # t index = t + offset (t >= 1 - lattice)
+    cover = {}
+    for kind, mask in (("jump", valid & ~walk_off[:, None]), ("walk", valid & walk_off[:, None])):
+        counts = np.zeros((len(dys), t_size + offset + 1), dtype=int); dy_index = np.broadcast_to(np.arange(len(dys)), land.shape)[mask]
+        np.add.at(counts, (dy_index, np.clip(t_lo[mask] + offset, 0, t_size + offset)), 1)
+        np.add.at(counts, (dy_index, np.clip(t_hi[mask] + offset + 1, 0, t_size + offset)), -1)
+        cover[kind] = np.cumsum(counts, axis=1)[:, :t_size + offset] > 0
+    # Reachable if every scroll phase has a walk-off at its e <= 0 or a jump from one of its e in [1, e_max]
+    e = np.arange(1 - lattice, e_max + 1); columns = e[None, :] + np.arange(gaps)[:, None] + offset # (gaps, e)
+    choice = np.where(e <= 0, cover["walk"][:, columns], cover["jump"][:, columns]) # (dys, gaps, e)
+    pad = (-len(e)) % lattice
+    choice = np.concatenate([choice, np.zeros(choice.shape[:2] + (pad,), dtype=bool)], axis=2).reshape(len(dys), gaps, -1, lattice)
+    return choice.any(axis=2).all(axis=2)
+
+def takeoff_speed(spawn_speed):
+    """Base speed by the time the player takes off toward a platform spawned at spawn_speed (the ramp while it scrolls into reach)."""
+    return spawn_speed + (SCREEN_WIDTH - PLATFORM_MIN_GAP_X - PLAYER_START_X) / spawn_speed * PLATFORM_SPEED_INCREASE
+
+def build_envelope_data(key):
+    """Integrates every strategy once (vertical motion doesn't depend on speed), then tabulates per speed bucket."""
+    print("Building reachability envelope (one-time, cached)...")
+    strategies = envelope_strategies(); bottoms, velocities, dashing = integrate_strategies(strategies)
+    walk_off = np.array([strategy[0] == 0 for strategy in strategies])
+    dys = np.arange(PLATFORM_MIN_GAP_Y, PLATFORM_MAX_GAP_Y + 1)
+    land, below = _landing_tables(bottoms, velocities, dys)
+    runs_table = []; speed = PLATFORM_START_SPEED
+    while speed <= ENVELOPE_MAX_SPEED:
+        fastest = takeoff_speed(speed) + ENVELOPE_SPEED_STEP # Top of the bucket, after the ramp before takeoff
+        reach = _reach_matrix(dashing, walk_off, land, below, dys, speed) & _reach_matrix(dashing, walk_off, land, below, dys, fastest)
+        edges = np.diff(np.pad(reach, ((1, 1), (0, 0))).astype(np.int8), axis=0) # +1 where a run of offsets starts, -1 one past its end
+        starts = np.nonzero(edges.T == 1); ends = np.nonzero(edges.T == -1) # Row-major over (gap, dy): runs come out sorted per gap
+        bucket_runs = [[] for _ in range(PLATFORM_MAX_GAP_X + 1)]
+        for gap, lo, hi in zip(starts[0].tolist(), starts[1].tolist(), ends[1].tolist()): bucket_runs[gap].append([int(dys[lo]), int(dys[hi - 1])])
+        runs_table.append(bucket_runs); speed += ENVELOPE_SPEED_STEP
+    return {"key": key, "speed_start": PLATFORM_START_SPEED, "speed_step": ENVELOPE_SPEED_STEP, "runs": runs_table}
+
+def lands_on_target(player, reference_rect, target_rect, speed, strategy, e, min_overlap=1):
+    """Runs strategy with the real physics from takeoff offset e, in the Simulation.step order.
+    Returns the pixels of target left under the player on landing if at least min_overlap, else 0."""
+    player.reset(); player.on_ground = player.can_boost = True; dx = player.rect.left + e - reference_rect.right
+    ref = pygame.sprite.Sprite(); ref.rect = reference_rect.move(dx, 0); target = pygame.sprite.Sprite(); target.rect = target_rect.move(dx, 0)
+    player.rect.bottom = ref.rect.top; track = PlatformTrack(); track.add(ref); track.add(target); base = speed
+    for step in range(1, ENVELOPE_MAX_STEPS + 1):
+        _apply_inputs(player, strategy_inputs(strategy, step))
+        effective = base + PLAYER_DASH_SPEED_BONUS if player.is_dashing else base
+        player.update(track)
+        if player.on_ground and player.rect.bottom == target.rect.top and player.rect.right > target.rect.left:
+            overlap = target.rect.right - player.rect.left; return overlap if overlap >= min_overlap else 0
+        if player.on_ground and step > 1 and player.rect.bottom == ref.rect.top: return 0 # Back on the reference
+        track.scroll(effective); base += PLATFORM_SPEED_INCREASE
+        if player.rect.top > SCREEN_HEIGHT * 2: return 0
+    return 0
+
+def find_landing(reference_rect, target_rect, speed, strategies=None):
+    """Brute-force proof, with lands_on_target, that target is reachable from reference in every scroll phase.
+    Returns [(strategy, e) per phase] or None."""
+    player = Player(); lattice = platform_move(speed); e_max = ENVELOPE_LANDING_MARGIN - lattice
+    strategies = strategies or envelope_strategies(); proof = []
+    for phase in range(lattice):
+        takeoffs = range(1 - lattice + phase, e_max + 1, lattice) # takeoffs[0] <= 0 is where this phase walks off
+        found = next(((strategy, e) for strategy in strategies for e in (takeoffs[:1] if strategy[0] == 0 else takeoffs[1:])
+                      if lands_on_target(player, reference_rect, target_rect, speed, strategy, e, ENVELOPE_LANDING_MARGIN)), None)
+        if found is None: return None
+        proof.append(found)
+    return proof
+
+# --- Helper: Game Over Screen (cached dimming overlay, one batched text blit) ---
+_overlay_cache = {} # (width, height) -> translucent dimming overlay
+
+def get_overlay_surface(size):
+    overlay = _overlay_cache.get(size)
+    if overlay is None: overlay=pygame.Surface(size,pygame.SRCALPHA);overlay.fill((0,0,0,180));_overlay_cache[size]=overlay=display_format(overlay)
+    return overlay
+
+def draw_game_over_screen(screen, font, score): # Draws once; the GAME_OVER scene waits for input
+    sw,sh=screen.get_size();screen.blit(get_overlay_surface((sw,sh)),(0,0))
     try:
-        t=[font.render(txt,True,WHITE) for txt in ["GAME OVER!",f"Score: {score}","Press SPACE to Restart","Press ESCAPE to Quit"]]
-        [screen.blit(t[i],(sw//2-t[i].get_width()//2,[sh//3,sh//2,sh*2//3,sh*2//3+40][i])) for i in range(4)]
+        t=[render_text(font,txt,WHITE) for txt in ["GAME OVER!",f"Score: {score}","Press SPACE to Restart","Press ESCAPE to Quit"]]
+        screen.blits([(t[i],(sw//2-t[i].get_width()//2,[sh//3,sh//2,sh*2//3,sh*2//3+40][i])) for i in range(4)],False)
     except Exception as e: print(f"Font error: {e}");pygame.draw.rect(screen,WHITE,(100,100,sw-200,sh-200),2)
-    pygame.display.flip(); w=True
-    while w:
-        pygame.time.Clock().tick(15);
-        for e in pygame.event.get():
-            if e.type==pygame.QUIT: pygame.quit();sys.exit()
-            if e.type==pygame.KEYDOWN:
-                if e.key==pygame.K_SPACE: w=False
-                if e.key==pygame.K_ESCAPE: pygame.quit();sys.exit()
+    pygame.display.flip()
 
 # --- Helper: Unified Platform Generation (Using Robust v8 version) ---
-def generate_next_platform(reference_platform, effective_speed, max_air_time):
-    """Calculates position and size for the next reachable platform using effective speed."""
+def generate_next_platform(reference_platform, effective_speed, max_air_time, rng=random, envelope=None):
+    """Calculates position and size for the next reachable platform using effective speed.
+    All randomness comes from rng so a seeded stream reproduces the same level.
+    With a ReachabilityEnvelope, pass the base platform speed (the envelope accounts for dashes itself);
+    the result is then provably reachable and max_air_time is unused."""
     if not reference_platform or not hasattr(reference_platform, 'rect'):
         print("Error: Invalid reference_platform passed to generate_next_platform.")
         return None
+    if envelope: return envelope.sample(reference_platform.rect, effective_speed, rng)
     try:
         max_physics_reach_x = max_air_time * effective_speed
         max_possible_gap_x = max(max_physics_reach_x, PLATFORM_MIN_GAP_X * 1.05)
         min_gap = PLATFORM_MIN_GAP_X; max_gap = min(PLATFORM_MAX_GAP_X, max_possible_gap_x)
         if min_gap > max_gap: max_gap = min_gap * 1.1
-        actual_gap_x = random.uniform(min_gap, max_gap)
+        actual_gap_x = rng.uniform(min_gap, max_gap)
         time_cross = actual_gap_x / effective_speed if effective_speed > 0.001 else 0
         player_dy = (PLAYER_JUMP_STRENGTH*time_cross)+(0.5*PLAYER_GRAVITY*time_cross**2) if time_cross>0 else 0
         player_reach_y = reference_platform.rect.y + player_dy
@@ -286,76 +853,383 @@ def generate_next_platform(reference_platform, effective_speed, max_air_time):
         if final_min_offset_y > final_max_offset_y:
             final_max_offset_y = final_min_offset_y + 40; final_max_offset_y = min(final_max_offset_y, PLATFORM_MAX_GAP_Y)
             if final_min_offset_y > final_max_offset_y: final_min_offset_y = 0; final_max_offset_y = 20
-        actual_offset_y = random.uniform(final_min_offset_y, final_max_offset_y)
+        actual_offset_y = rng.uniform(final_min_offset_y, final_max_offset_y)
         next_plat_x = reference_platform.rect.right + actual_gap_x
         next_plat_y = reference_platform.rect.y + actual_offset_y
         next_plat_y = max(PLATFORM_HEIGHT*3, next_plat_y); next_plat_y = min(SCREEN_HEIGHT-PLATFORM_HEIGHT*4, next_plat_y)
-        plat_width = random.randint(PLATFORM_MIN_WIDTH, PLATFORM_MAX_WIDTH)
+        plat_width = rng.randint(PLATFORM_MIN_WIDTH, PLATFORM_MAX_WIDTH)
         return next_plat_x, next_plat_y, plat_width
     except Exception as e:
         print(f"ERROR during platform generation calculation: {e}"); import traceback; traceback.print_exc()
         print(f"  Ref Rect: {reference_platform.rect if reference_platform else 'None'}"); print(f"  Speed: {effective_speed:.3f}"); print(f"  Air Time: {max_air_time:.3f}")
         return None
 
-# --- Main Game Loop Function (Using v8 Logic) ---
-def game_loop(screen, clock, font):
-    MAX_ESTIMATED_AIR_TIME = calculate_max_air_time()
-    all_sprites = pygame.sprite.Group()
-    platforms = pygame.sprite.Group()
-    player = Player()
-    all_sprites.add(player)
-
-    start_platform = Platform(player.rect.centerx - 75, PLAYER_START_Y, 150)
-    all_sprites.add(start_platform); platforms.add(start_platform)
-    last_platform_generated = start_platform
-    initial_effective_speed = PLATFORM_START_SPEED
-    while last_platform_generated.rect.right < SCREEN_WIDTH + PLATFORM_MAX_GAP_X:
-        platform_data = generate_next_platform(last_platform_generated, initial_effective_speed, MAX_ESTIMATED_AIR_TIME)
-        if platform_data: px, py, pw = platform_data; new_platform = Platform(px, py, pw); all_sprites.add(new_platform); platforms.add(new_platform); last_platform_generated = new_platform
-        else: break
-
-    current_base_speed = PLATFORM_START_SPEED
-    score = 0; game_over = False; running = True
+# --- Chunked Level Generator (NumPy) ---
+class LevelSegment:
+    """K platforms as parallel arrays, each row relative to the platform before it:
+    gap_x from its right edge, offset_y from its top, plus the new platform's width.
+    Envelope segments carry a quantile per row instead of offset_y: the reachable offsets depend on the
+    reference platform's top, so each spawn still resolves its offset with a scalar ReachabilityEnvelope.sample;
+    only the gap, quantile and width draws are vectorized."""
+    __slots__ = ("gap_x", "offset_y", "width", "speed", "quantile")
+    def __init__(self, gap_x, offset_y, width, speed, quantile=None):
+        self.gap_x = gap_x; self.offset_y = offset_y; self.width = width; self.speed = speed; self.quantile = quantile
+    def __len__(self): return len(self.gap_x)
+
+def generate_level_segment(np_rng, effective_speed, max_air_time, count=LEVEL_CHUNK_SIZE, envelope=None):
+    """generate_next_platform's gap/reach/clamp rules for count platforms in one vectorized pass.
+    Every row uses effective_speed, so keep count small enough that the speed ramp inside a chunk is negligible.
+    With a ReachabilityEnvelope, gaps are drawn from the envelope's reachable gaps instead and offsets are left to a
+    per-spawn envelope.sample call, so the vectorized pass covers only the gap, quantile and width draws."""
+    if envelope:
+        valid_gaps = np.asarray(envelope.valid_gaps[envelope.bucket(effective_speed)] or [PLATFORM_MIN_GAP_X])
+        gap_x = valid_gaps[np_rng.integers(0, len(valid_gaps), count)]; quantile = np_rng.random(count)
+        width = np_rng.integers(PLATFORM_MIN_WIDTH, PLATFORM_MAX_WIDTH, count, endpoint=True)
+        return LevelSegment(gap_x, None, width, effective_speed, quantile)
+    max_possible_gap_x = max(max_air_time * effective_speed, PLATFORM_MIN_GAP_X * 1.05)
+    min_gap = PLATFORM_MIN_GAP_X; max_gap = min(PLATFORM_MAX_GAP_X, max_possible_gap_x)
+    if min_gap > max_gap: max_gap = min_gap * 1.1
+    gap_x = np_rng.uniform(min_gap, max_gap, count)
+    time_cross = gap_x / effective_speed if effective_speed > 0.001 else np.zeros(count)
+    player_dy = np.where(time_cross > 0, PLAYER_JUMP_STRENGTH * time_cross + 0.5 * PLAYER_GRAVITY * time_cross ** 2, 0.0)
+    min_offset_y = np.maximum(PLATFORM_MIN_GAP_Y, player_dy + PLATFORM_REACH_MARGIN)
+    max_offset_y = np.full(count, float(PLATFORM_MAX_GAP_Y))
+    inverted = min_offset_y > max_offset_y # Same fallbacks as the scalar version
+    max_offset_y[inverted] = np.minimum(min_offset_y[inverted] + 40, PLATFORM_MAX_GAP_Y)
+    inverted = min_offset_y > max_offset_y
+    min_offset_y[inverted] = 0; max_offset_y[inverted] = 20
+    offset_y = np_rng.uniform(min_offset_y, max_offset_y)
+    width = np_rng.integers(PLATFORM_MIN_WIDTH, PLATFORM_MAX_WIDTH, count, endpoint=True)
+    return LevelSegment(gap_x, offset_y, width, effective_speed)
+
+def iter_level_segments(np_rng, speed=PLATFORM_START_SPEED, max_air_time=None, count=LEVEL_CHUNK_SIZE, envelope=None):
+    """Endless stream of LevelSegments. speed is a number or a zero-argument callable read once per segment.
+    Pass the game's ReachabilityEnvelope (Simulation.envelope) to get the segments it actually plays."""
+    if max_air_time is None and envelope is None: max_air_time = calculate_max_air_time()
+    while True: yield generate_level_segment(np_rng, speed() if callable(speed) else speed, max_air_time, count, envelope)
+
+def layout_segment(segment, start_right, start_y, envelope=None, speeds=None):
+    """Absolute (x, y, width) arrays for a segment following a platform with the given right edge and top,
+    for offline analysis. x is a cumulative sum; y is clamped to the screen row by row like the game does.
+    Envelope segments need the envelope that generated them, and resolve each row at the base speed it spawns at:
+    speeds[i] if given (e.g. recorded from a Simulation), else the speed ramped over the rows before it, dashes ignored.
+    That path is a per-row Python loop over envelope.sample, not an array pass."""
+    if segment.offset_y is None:
+        if envelope is None: raise ValueError("layout_segment needs the envelope for segments generated with one")
+        x = np.empty(len(segment)); y = np.empty(len(segment)); width = segment.width.copy()
+        reference = pygame.Rect(start_right - 1, start_y, 1, PLATFORM_HEIGHT); previous_right = start_right; speed = segment.speed
+        for i, (gap_x, quantile, row_width) in enumerate(zip(segment.gap_x.tolist(), segment.quantile.tolist(), segment.width.tolist())):
+            if speeds is not None: speed = speeds[i]
+            elif i: speed += (reference.right - previous_right) / speed * PLATFORM_SPEED_INCREASE # Each row spawns once the last one scrolled its gap + width
+            placed = envelope.sample(reference, speed, gap=gap_x, quantile=quantile, width=row_width)
+            if placed is None: return x[:i], y[:i], width[:i] # No reachable offset left: the game stops spawning here too
+            x[i], y[i], width[i] = placed; previous_right = reference.right; reference = pygame.Rect(placed[0], placed[1], placed[2], PLATFORM_HEIGHT)
+        return x, y, width
+    widths = segment.width.astype(float); x = np.empty(len(segment)); y = np.empty(len(segment))
+    x[0] = start_right + segment.gap_x[0]
+    x[1:] = x[0] + np.cumsum(widths[:-1] + segment.gap_x[1:])
+    lo = PLATFORM_HEIGHT * 3; hi = SCREEN_HEIGHT - PLATFORM_HEIGHT * 4; prev_y = start_y
+    for i, offset in enumerate(segment.offset_y.tolist()): prev_y = y[i] = min(hi, max(lo, prev_y + offset)) # Clamp depends on the previous row
+    return x, y, segment.width
+
+class LevelStream:
+    """Hands out generate_next_platform-style (x, y, width) tuples from an iter_level_segments stream, so spawning
+    in the frame loop is an array read; the next segment is pulled only when the current one runs out.
+    Pass the base platform speed: a whole segment is generated at the speed it is pulled at, so a dash
+    in progress must not leak into its rows. With an envelope, each spawn still pays for a scalar envelope.sample."""
+    def __init__(self, seed, max_air_time, chunk_size=LEVEL_CHUNK_SIZE, envelope=None):
+        self.envelope = envelope; self.speed = PLATFORM_START_SPEED # Speed the next segment is generated at
+        self.segments = iter_level_segments(np.random.default_rng(seed), lambda: self.speed, max_air_time, chunk_size, envelope)
+        self.rows = []; self.index = 0 # Current segment as plain Python (gap_x, offset_y, width) tuples
+
+    def next_platform(self, reference_platform, speed):
+        if self.index >= len(self.rows):
+            self.speed = speed; segment = next(self.segments)
+            offsets = segment.quantile if segment.offset_y is None else segment.offset_y
+            self.rows = list(zip(segment.gap_x.tolist(), offsets.tolist(), segment.width.tolist())); self.index = 0 # tolist(): no NumPy scalars per spawn
+        gap_x, offset_y, width = self.rows[self.index]; self.index += 1
+        if self.envelope: # offset_y is a quantile: resolve it against the reference's top and the screen
+            return self.envelope.sample(reference_platform.rect, speed, gap=gap_x, quantile=offset_y, width=width)
+        next_plat_x = reference_platform.rect.right + gap_x
+        next_plat_y = reference_platform.rect.y + offset_y
+        next_plat_y = max(PLATFORM_HEIGHT*3, next_plat_y); next_plat_y = min(SCREEN_HEIGHT-PLATFORM_HEIGHT*4, next_plat_y)
+        return next_plat_x, next_plat_y, width
+
+# --- Simulation: Headless Game State ---
+INPUT_JUMP = 1      # SPACE pressed -> Player.jump()
+INPUT_STOP_JUMP = 2 # SPACE released -> Player.stop_jump()
+
+def scripted_inputs(frame):
+    """Jump every 40 frames and hold for 12: keeps the player moving through every pose and a dash.
+    A fixed, level-blind input script for benchmarks and sweep baselines."""
+    phase = frame % 40
+    if phase == 0: return (INPUT_JUMP,)
+    if phase == 12: return (INPUT_STOP_JUMP,)
+    if phase == 20: return (INPUT_JUMP,) # Boost/dash
+    if phase == 30: return (INPUT_STOP_JUMP,)
+    return ()
+
+class Simulation:
+    """Owns player, platforms, speed and score. step() advances one tick with no display, clock or font,
+    so it can run far faster than real time; renderers just read all_sprites and score afterwards.
+    Each sprite keeps prev_topleft from the previous tick so renderers can interpolate between ticks.
+    With reachable=True (and an envelope available) every platform is placed from the ReachabilityEnvelope."""
+    def __init__(self, seed=None, max_platforms=MAX_LIVE_PLATFORMS, level_generator=DEFAULT_LEVEL_GENERATOR, reachable=True):
+        if level_generator == "chunked" and np is None: raise RuntimeError("The chunked level generator needs NumPy; use level_generator='scalar'")
+        self.max_platforms = max_platforms; self.level_generator = level_generator
+        self.max_air_time = calculate_max_air_time()
+        self.envelope = ReachabilityEnvelope.shared() if reachable else None # None without NumPy and without a cached table
+        self.platform_pool = PlatformPool()
+        self.all_sprites = pygame.sprite.Group()
+        self.platforms = PlatformTrack()
+        self.player = Player()
+        self.profiler = None # Optional FrameProfiler; step() laps player/platform/spawn phases into it
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Starts a new run in place, reusing the sprite groups, player, platform pool and caches."""
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.level_rng = random.Random(f"{self.seed}:level")     # Level layout only (scalar draws or the LevelStream seed)
+        self.level_stream = LevelStream(self.level_rng.getrandbits(64), self.max_air_time, envelope=self.envelope) if self.level_generator == "chunked" else None
+        self.texture_rng = random.Random(f"{self.seed}:texture") # Platform surfaces only, never affects gameplay
+        for platform in self.platforms: self.platform_pool.release(platform)
+        self.platforms.clear(); self.all_sprites.empty()
+        self.player.reset(); self.all_sprites.add(self.player)
+
+        start_platform = self.platform_pool.acquire(self.player.rect.centerx - 75, PLAYER_START_Y, 150, self.texture_rng)
+        self.all_sprites.add(start_platform); self.platforms.add(start_platform)
+        self.last_platform_generated = start_platform; self.current_base_speed = PLATFORM_START_SPEED
+        while self.last_platform_generated.rect.right < SCREEN_WIDTH + PLATFORM_MAX_GAP_X:
+            if not self._spawn_platform(PLATFORM_START_SPEED): break
+
+        self.score = 0; self.frame = 0; self.game_over = False
+
+    @property
+    def display_score(self): return self.score // 10
+
+    def _spawn_platform(self, effective_speed):
+        if self.envelope or self.level_stream: effective_speed = self.current_base_speed # The envelope accounts for dashes itself; a segment must not bake one in
+        if self.level_stream: platform_data = self.level_stream.next_platform(self.last_platform_generated, effective_speed)
+        else: platform_data = generate_next_platform(self.last_platform_generated, effective_speed, self.max_air_time, self.level_rng, self.envelope)
+        if not platform_data: return None
+        px, py, pw = platform_data; new_platform = self.platform_pool.acquire(px, py, pw, self.texture_rng)
+        self.all_sprites.add(new_platform); self.platforms.add(new_platform); self.last_platform_generated = new_platform
+        return new_platform
+
+    def step(self, inputs=()):
+        """Advances one tick. inputs is a sequence of INPUT_* codes applied in order. Returns game_over."""
+        if self.game_over: return True
+        player = self.player; prof = self.profiler
+        for code in inputs:
+            if code == INPUT_JUMP: player.jump()
+            elif code == INPUT_STOP_JUMP: player.stop_jump()
+
+        for sprite in self.all_sprites: sprite.prev_topleft = sprite.rect.topleft # Interpolation snapshot
+        self.current_base_speed += PLATFORM_SPEED_INCREASE # Update speed
+        effective_speed = self.current_base_speed + PLAYER_DASH_SPEED_BONUS if player.is_dashing else self.current_base_speed
+
+        player.update(self.platforms) # Update player (handles dash timer, animation state)
+        if prof: prof.lap("player_update")
+        for platform in self.platforms.scroll(effective_speed): # Scroll platforms, recycling the ones that left the screen
+            self.all_sprites.remove(platform); self.platform_pool.release(platform)
+        if prof: prof.lap("platforms_update")
+
+        platform_count = len(self.platforms) # Dynamic spawning
+        spawn_trigger_x = SCREEN_WIDTH - PLATFORM_MIN_GAP_X
+        if self.last_platform_generated and self.last_platform_generated.rect.right < spawn_trigger_x and platform_count < self.max_platforms:
+            self._spawn_platform(effective_speed)
+        if prof: prof.lap("spawn")
+
+        self.score += 1; self.frame += 1 # Score and game over check
+        if player.rect.top > SCREEN_HEIGHT + player.base_height: self.game_over = True
+        return self.game_over
+
+def unreachable_spawns(count, seed=None, level_generator=DEFAULT_LEVEL_GENERATOR):
+    """Spawns count platforms through a Simulation, sweeping the base speed from start to ENVELOPE_MAX_SPEED, and proves each
+    one reachable from the one before with find_landing at its spawn and takeoff speeds. Returns [(speed, reference, platform
+    or None), ...] for the ones that fail, or None without a reachability envelope."""
+    sim = Simulation(seed, level_generator=level_generator)
+    if sim.envelope is None: return None
+    failures = []
+    for i in range(count):
+        speed = sim.current_base_speed = PLATFORM_START_SPEED + (ENVELOPE_MAX_SPEED - PLATFORM_START_SPEED) * i / count
+        reference = sim.last_platform_generated.rect.copy(); platform = sim._spawn_platform(speed)
+        if platform is None: failures.append((speed, reference, None)); continue
+        failed = next((s for s in (speed, takeoff_speed(speed)) if find_landing(reference, platform.rect, s) is None), None)
+        if failed is not None: failures.append((failed, reference, platform.rect.copy()))
+        sim.platforms.clear(); sim.platforms.add(platform) # Only the last platform matters here
+    return failures
+
+# --- Input Recording & Replay ---
+INPUT_NONE = 0 # Filler event for gaps longer than one delta field
+
+class InputRecording:
+    """A run as seed + per-frame input codes. Stored as a header and run-length encoded events:
+    each event is (frames since previous event, code), so idle stretches cost nothing."""
+    MAGIC = b"RRIR"; VERSION = 3
+    HEADER = struct.Struct("<4sBBBIII") # magic, version, level generator index, reachable flag, seed, frame_count, final score
+    HEADER_V2 = struct.Struct("<4sBBIII") # No reachable flag: levels predate the reachability envelope
+    HEADER_V1 = struct.Struct("<4sBIII") # No generator field either: always the scalar generator
+    EVENT = struct.Struct("<HB")      # frame delta, input code
+
+    def __init__(self, seed, events=None, frame_count=0, score=0, level_generator=DEFAULT_LEVEL_GENERATOR, reachable=True):
+        self.seed = seed; self.level_generator = level_generator; self.reachable = reachable; self.events = events if events is not None else [] # [(frame, code), ...] in order
+        self.frame_count = frame_count; self.score = score
+
+    def record(self, frame, inputs):
+        for code in inputs: self.events.append((frame, code))
+
+    def finish(self, sim): self.frame_count = sim.frame; self.score = sim.score
+
+    def inputs_by_frame(self):
+        frames = {}
+        for frame, code in self.events:
+            if code != INPUT_NONE: frames.setdefault(frame, []).append(code)
+        return frames
+
+    def to_bytes(self):
+        out = [self.HEADER.pack(self.MAGIC, self.VERSION, LEVEL_GENERATORS.index(self.level_generator), int(self.reachable), self.seed, self.frame_count, self.score)]; last = 0
+        for frame, code in self.events:
+            delta = frame - last
+            while delta > 0xFFFF: out.append(self.EVENT.pack(0xFFFF, INPUT_NONE)); delta -= 0xFFFF
+            out.append(self.EVENT.pack(delta, code)); last = frame
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version = data[:4], data[4] if len(data) > 4 else None
+        if magic != cls.MAGIC or version not in (1, 2, cls.VERSION): raise ValueError(f"Not a Rapid Runner recording (magic={magic!r}, version={version})")
+        reachable = False
+        if version == 1: header = cls.HEADER_V1; _, _, seed, frame_count, score = header.unpack_from(data); level_generator = "scalar"
+        elif version == 2: header = cls.HEADER_V2; _, _, generator_index, seed, frame_count, score = header.unpack_from(data); level_generator = LEVEL_GENERATORS[generator_index]
+        else: header = cls.HEADER; _, _, generator_index, reachable, seed, frame_count, score = header.unpack_from(data); level_generator = LEVEL_GENERATORS[generator_index]; reachable = bool(reachable)
+        events = []; frame = 0
+        for delta, code in cls.EVENT.iter_unpack(data[header.size:]):
+            frame += delta
+            if code != INPUT_NONE: events.append((frame, code))
+        return cls(seed, events, frame_count, score, level_generator, reachable)
+
+    def save(self, path):
+        with open(path, "wb") as f: f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f: return cls.from_bytes(f.read())
+
+def replay(recording, renderer=None, clock=None, font=None):
+    """Re-simulates a recording. Without a renderer it runs flat out; with one it renders every frame
+    and, given a clock, paces to FPS. Returns the finished Simulation."""
+    sim = Simulation(recording.seed, level_generator=recording.level_generator, reachable=recording.reachable); inputs = recording.inputs_by_frame()
+    if renderer: renderer.invalidate()
+    while sim.frame < recording.frame_count and not sim.game_over:
+        sim.step(inputs.get(sim.frame, ()))
+        if renderer:
+            try: score_display = render_text(font, f"Score: {sim.display_score}", BLACK) if font else None
+            except Exception: score_display = None
+            renderer.render(sim.all_sprites, [(score_display, HUD_POS)] if score_display else []); pygame.event.pump()
+            if clock: clock.tick(PHYSICS_HZ) # One recorded tick per frame
+    return sim
+
+# --- Main Game Loop Function (Scene state machine) ---
+SCENE_PLAYING = "playing"     # Simulation steps and renders every frame
+SCENE_GAME_OVER = "game_over" # Overlay shown, waiting for SPACE/ESCAPE
+SCENE_RESTART = "restart"     # Resets the simulation in place, then back to PLAYING
+GAME_OVER_FPS = 15
+
+def game_loop(screen, clock, font, renderer=None, record_path=None, render_fps=FPS, profiler=None, reachable=True):
+    """Runs physics on a fixed PHYSICS_DT accumulator and renders interpolated positions at up to render_fps (0 = uncapped).
+    With a FrameProfiler, every PLAYING frame is timed per phase and F3 toggles the percentile overlay."""
+    if renderer is None: renderer = FlipRenderer(screen)
+    renderer.invalidate()
+    sim = Simulation(reachable=reachable)
+    prof = sim.profiler = renderer.profiler = profiler
+    overlay_font = pygame.font.Font(None, 22) if prof else None
+    recording = InputRecording(sim.seed, level_generator=sim.level_generator, reachable=sim.envelope is not None) if record_path else None
+    scene = SCENE_PLAYING; running = True
+    accumulator = 0.0; last_time = time.perf_counter(); pending_inputs = [] # Inputs wait for the next physics step
 
     while running:
+        if prof: prof.begin_frame()
+        now = time.perf_counter(); accumulator += now - last_time; last_time = now
+        inputs = pending_inputs; restart_pressed = False
         for event in pygame.event.get(): # Event handling
             if event.type == pygame.QUIT: running = False
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and not game_over: player.jump()
+                if event.key == pygame.K_SPACE: inputs.append(INPUT_JUMP); restart_pressed = True
                 if event.key == pygame.K_ESCAPE: running = False
+                if event.key == PROFILE_OVERLAY_KEY and prof: prof.show_overlay = not prof.show_overlay; renderer.invalidate()
             if event.type == pygame.KEYUP:
-                 if event.key == pygame.K_SPACE and not game_over: player.stop_jump()
+                 if event.key == pygame.K_SPACE: inputs.append(INPUT_STOP_JUMP)
 
         if not running: break
-        if game_over: show_game_over_screen(screen, font, score // 10); game_loop(screen, clock, font); return
-
-        current_base_speed += PLATFORM_SPEED_INCREASE # Update speed
-        effective_speed = current_base_speed + PLAYER_DASH_SPEED_BONUS if player.is_dashing else current_base_speed
+        if prof: prof.lap("events")
 
-        player.update(platforms) # Update player (handles dash timer, animation state)
-        platforms.update(effective_speed) # Update platforms with current effective speed
+        if scene == SCENE_PLAYING:
+            steps = 0
+            while accumulator >= PHYSICS_DT and steps < MAX_CATCHUP_STEPS and not sim.game_over:
+                if recording: recording.record(sim.frame, inputs)
+                sim.step(inputs); inputs = []
+                accumulator -= PHYSICS_DT; steps += 1
+            if steps == MAX_CATCHUP_STEPS and accumulator >= PHYSICS_DT: accumulator = 0.0 # Too far behind: drop time, not ticks
+            pending_inputs = inputs
 
-        platform_count = len(platforms) # Dynamic spawning
-        spawn_trigger_x = SCREEN_WIDTH - PLATFORM_MIN_GAP_X
-        if last_platform_generated and last_platform_generated.rect.right < spawn_trigger_x and platform_count < 12:
-             platform_data = generate_next_platform(last_platform_generated, effective_speed, MAX_ESTIMATED_AIR_TIME)
-             if platform_data: px, py, pw = platform_data; new_platform = Platform(px, py, pw); all_sprites.add(new_platform); platforms.add(new_platform); last_platform_generated = new_platform
+            try: hud_items = [(render_text(font, f"Score: {sim.display_score}", BLACK), HUD_POS)] # Drawing
+            except Exception: hud_items = []
+            if prof and prof.show_overlay: hud_items.append(prof.overlay_item(overlay_font, screen.get_width()))
+            if prof: prof.lap("font")
+            renderer.render(sim.all_sprites, hud_items, min(1.0, accumulator / PHYSICS_DT)) # Draw and present (full flip or dirty rects)
+            if prof: prof.end_frame()
 
-        score += 1 # Score and game over check
-        if player.rect.top > SCREEN_HEIGHT + player.base_height: game_over = True
+            if sim.game_over:
+                if recording: recording.finish(sim); recording.save(record_path)
+                draw_game_over_screen(screen, font, sim.display_score); scene = SCENE_GAME_OVER
+            clock.tick(render_fps) # Render rate cap only; physics rate comes from the accumulator
 
-        draw_sky(screen) # Drawing
-        all_sprites.draw(screen)
-        try: score_display = font.render(f"Score: {score // 10}", True, BLACK); screen.blit(score_display, (10, 10))
-        except Exception: pass
+        elif scene == SCENE_GAME_OVER:
+            pending_inputs = []
+            if restart_pressed: scene = SCENE_RESTART
+            clock.tick(GAME_OVER_FPS)
 
-        pygame.display.flip() # Display update
-        clock.tick(FPS) # Frame rate control
+        elif scene == SCENE_RESTART:
+            sim.reset()
+            if recording: recording = InputRecording(sim.seed, level_generator=sim.level_generator, reachable=sim.envelope is not None)
+            accumulator = 0.0; last_time = time.perf_counter()
+            renderer.invalidate(); scene = SCENE_PLAYING
 
+    if recording and scene == SCENE_PLAYING: recording.finish(sim); recording.save(record_path)
+    if prof and prof.csv_path: prof.write_csv(prof.csv_path)
     pygame.quit(); sys.exit()
 
 # --- Initialization and Game Start ---
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Rapid Runner")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="flip", help="full-screen flip (default) or dirty-rect updates")
+    parser.add_argument("--fps", type=int, default=FPS, help=f"render rate cap, 0 for uncapped (physics always runs at {PHYSICS_HZ} Hz)")
+    parser.add_argument("--profile", action="store_true", help="time each frame phase (F3 toggles the p50/p95/p99 overlay)")
+    parser.add_argument("--profile-csv", metavar="PATH", help="with profiling, write the buffered per-frame phase timings to PATH on exit (implies --profile)")
+    parser.add_argument("--profile-frames", type=int, default=PROFILE_CAPACITY, help="profiler ring buffer size in frames")
+    parser.add_argument("--record", metavar="PATH", help="save each run's seed and inputs to PATH (overwritten per run)")
+    parser.add_argument("--replay", metavar="PATH", help="re-simulate a recording instead of playing")
+    parser.add_argument("--replay-speed", choices=["max", "realtime"], default="max", help="max: headless, no frame limiter; realtime: rendered at FPS")
+    parser.add_argument("--build-envelope", action="store_true", help="build and cache the reachability envelope for the current constants, then exit")
+    args = parser.parse_args()
+    if args.build_envelope:
+        if np is None: print("Building the reachability envelope needs NumPy"); sys.exit(1)
+        start = time.perf_counter(); envelope = ReachabilityEnvelope.shared()
+        path = os.path.join(ENVELOPE_CACHE_DIR, f"reach_envelope_{envelope.key}.json") if ENVELOPE_CACHE_DIR else None
+        cached = bool(path) and os.path.exists(path)
+        print(f"Reachability envelope {envelope.key} ready in {time.perf_counter() - start:.1f}s: " + (path if cached else "not cached"))
+        sys.exit(0 if cached else 1)
+    recording = InputRecording.load(args.replay) if args.replay else None # Replays still build the table if their levels need it
+    if recording and args.replay_speed == "max":
+        sim = replay(recording)
+        status = "OK" if sim.score == recording.score else "MISMATCH"
+        print(f"Replayed {sim.frame} frames: score {sim.display_score} (raw {sim.score}, recorded {recording.score}) {status}")
+        sys.exit(0 if status == "OK" else 1)
+    if not recording and ReachabilityEnvelope.shared(build=False) is None:
+        print("No cached reachability envelope for these constants: levels use the air-time heuristic and may have impossible gaps."
+              + (" Run with --build-envelope to build one." if np is not None else " Install NumPy to build one."))
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Rapid Runner Polygon v8.1")
@@ -363,6 +1237,10 @@ if __name__ == '__main__':
     if not pygame.font.get_init(): pygame.font.init()
     try: game_font = pygame.font.Font(None, 50)
     except OSError: game_font = pygame.font.SysFont(pygame.font.get_default_font(), 50)
-    try: game_loop(screen, clock, game_font)
+    profiler = None
+    if args.profile or args.profile_csv: profiler = FrameProfiler(args.profile_frames); profiler.csv_path = args.profile_csv
+    try:
+        if recording: replay(recording, RENDERERS[args.renderer](screen), clock, game_font)
+        else: game_loop(screen, clock, game_font, RENDERERS[args.renderer](screen), args.record, args.fps, profiler, ReachabilityEnvelope.shared(build=False) is not None)
     except Exception as e: print(f"\nFATAL ERROR: {e}"); import traceback; traceback.print_exc()
     finally: pygame.quit(); sys.exit()
\ No newline at end of file
@@ -0,0 +1,253 @@
+# Rapid Runner Parameter Sweep - headless bot runs over a grid of game constants, fanned across processes
+#
+#   python sweep_rapidrunner.py --grid PLATFORM_SPEED_INCREASE=0.002,0.0025,0.003 --runs 20 --output sweep.jsonl
+#   python sweep_rapidrunner.py --grid PLAYER_DASH_SPEED_BONUS=3:6:0.5 --grid PLATFORM_MAX_GAP_X=160,200 --bot scripted
+#
+# Each run is one life of a bot on a seeded level; results stream to --output as JSON lines while the sweep runs.
+#
+# Every distinct physics config needs its own reachability envelope: the first sweep over it builds one (about
+# 17 s of one core) and caches it as a ~320 KB JSON file in --cache-dir. Every sweepable constant except
+# PLATFORM_MAX_WIDTH is part of the envelope key (PLATFORM_SPEED_INCREASE included: the ramp during a jump and
+# before takeoff changes what is reachable), so a grid of thousands of configs means thousands of builds and
+# hundreds of MB of cache. Point --cache-dir somewhere disposable for big grids and delete it afterwards.
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Must be set before pygame initialises video
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import rapidrunner as rr
+
+# --- Settings ---
+SWEEP_PARAMS = ( # Constants a worker may override; all are read at call time, so setting them on the module is enough
+    "PLAYER_GRAVITY", "PLAYER_JUMP_STRENGTH", "PLAYER_JUMP_CUTOFF_MULTIPLIER", "PLAYER_BOOST_STRENGTH", "PLAYER_MAX_FALL_SPEED",
+    "PLAYER_DASH_DURATION_FRAMES", "PLAYER_DASH_SPEED_BONUS", "PLATFORM_MIN_WIDTH", "PLATFORM_MAX_WIDTH", "PLATFORM_START_SPEED",
+    "PLATFORM_SPEED_INCREASE", "PLATFORM_MIN_GAP_X", "PLATFORM_MAX_GAP_X", "PLATFORM_MIN_GAP_Y", "PLATFORM_MAX_GAP_Y")
+DEFAULT_RUNS = 10 # Runs (seeds) per configuration
+DEFAULT_MAX_FRAMES = 60 * 60 * 5 # Five minutes of play; a run that lasts this long counts as survived
+DEATH_CAUSES = ("unreachable", "missed") # Fell short of a platform the envelope rules out / one it says the bot could reach
+
+# --- Grid ---
+def parse_grid_arg(text):
+    """NAME=v1,v2,... or NAME=start:stop:step (stop inclusive) -> (name, [values]) typed like the current constant."""
+    name, _, spec = text.partition("=")
+    if name not in SWEEP_PARAMS: raise argparse.ArgumentTypeError(f"{name!r} is not sweepable; choose from {', '.join(SWEEP_PARAMS)}")
+    kind = type(getattr(rr, name))
+    try:
+        if ":" in spec:
+            start, stop, step = (float(part) for part in spec.split(":"))
+            if step <= 0: raise ValueError("step must be positive")
+            count = int(round((stop - start) / step)) + 1
+            values = [round(start + i * step, 10) for i in range(count)]
+            if kind is int and any(value != int(value) for value in values): raise ValueError(f"{name} is an integer, so start and step must be whole numbers")
+            values = [kind(value) for value in values]
+        else: values = [kind(value) for value in spec.split(",")]
+    except ValueError as e: raise argparse.ArgumentTypeError(f"bad values for {name}: {spec!r} ({e})")
+    if not values: raise argparse.ArgumentTypeError(f"no values for {name}")
+    return name, values
+
+def expand_grid(grid):
+    """Cartesian product of [(name, values), ...] as a list of {name: value} configs (a single empty config without a grid)."""
+    names = [name for name, _ in grid]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in grid))]
+
+def task_seed(base_seed, run):
+    """Level seed for run number run. Independent of the config, so every config plays the same levels."""
+    return random.Random(f"{base_seed}:run:{run}").getrandbits(32)
+
+# --- Bots ---
+class ScriptedBot:
+    """rapidrunner.scripted_inputs' fixed jump/boost cadence; ignores the level entirely."""
+    def __init__(self, sim): self.sim = sim
+    def inputs(self): return rr.scripted_inputs(self.sim.frame)
+
+class GreedyBot:
+    """Jumps at the ground step whose real-physics landing on the next platform leaves a way on to the one after it,
+    with the most platform left under it. Strategies are ranked from precomputed trajectories, then confirmed with lands_on_target."""
+    VERIFY = 16 # Ranked candidates tried with the real physics per takeoff offset
+    MAX_GAPS = 8 # Gap tables kept; the bot only ever looks at two gaps at once
+    _tables = {} # Physics key -> (strategies, walk_off, bottoms, velocities, dashing), current key only; shared by every bot in the process
+
+    def __init__(self, sim):
+        if rr.np is None: raise RuntimeError("The greedy bot needs NumPy; use --bot scripted")
+        key = rr.ReachabilityEnvelope.physics_key()
+        if key not in self._tables:
+            strategies = rr.envelope_strategies()
+            GreedyBot._tables = {key: (strategies, rr.np.array([strategy[0] == 0 for strategy in strategies])) + rr.integrate_strategies(strategies)} # Drops the previous config's tables
+        self.strategies, self.walk_off, self.bottoms, self.velocities, self.dashing = self._tables[key]
+        self.sim = sim; self.probe = rr.Player(); self.plan = None; self.plan_step = 0
+        self.gaps = {} # Geometry -> (ranking tables, {e: real landing}); not keyed by sprite, pooled platforms are reused
+
+    def gap_tables(self, reference, target, speed):
+        """Cached ranking arrays (gap, width, valid, t_lo, t_hi, x_land) and real landings for jumping from reference to target.
+        The t windows are the envelope's, with Player.update's snap-up landings allowed."""
+        geometry = (target.rect.left - reference.rect.right, target.rect.top - reference.rect.top, reference.rect.width, target.rect.width)
+        entry = self.gaps.get(geometry)
+        if entry is None:
+            if len(self.gaps) >= self.MAX_GAPS: self.gaps.clear()
+            land, below = rr.landing_steps(self.bottoms, self.velocities, geometry[1], snap=True)
+            shift = rr.scroll_shift(self.dashing, speed); rows = rr.np.arange(len(land)); pw = self.probe.rect.width; width = target.rect.width
+            x_land = shift[rows, rr.np.maximum(land, 0)]; x_below = rr.np.where(below >= 0, shift[rows, rr.np.maximum(below, 0)], -10**6)
+            t_lo = rr.np.maximum(x_below + pw, x_land - width + 1); t_hi = x_land + pw - 1
+            entry = self.gaps[geometry] = ((geometry[0], width, (land >= 0) & (t_lo <= t_hi), t_lo, t_hi, x_land), {})
+        return entry
+
+    def landing(self, reference, target, speed, e):
+        """(overlap, strategy) for the real landing from takeoff offset e with the most target left under the player,
+        trying the VERIFY best-ranked strategies; (0, None) if none lands. e <= 0 (walked off) allows every strategy,
+        e > 0 only the ones that leave the ground on step 1."""
+        (gap, width, valid, t_lo, t_hi, x_land), landings = self.gap_tables(reference, target, speed)
+        if e in landings: return landings[e]
+        t = e + gap
+        candidates = valid & (t_lo <= t) & (t <= t_hi)
+        if e > 0: candidates &= ~self.walk_off
+        ranked = rr.np.flatnonzero(candidates); ranked = ranked[rr.np.argsort(x_land[ranked], kind="stable")][:self.VERIFY] # Least scroll: most overlap
+        best = (0, None)
+        for index in ranked.tolist():
+            strategy = self.strategies[index]; overlap = rr.lands_on_target(self.probe, reference.rect, target.rect, speed, strategy, e)
+            if overlap > best[0]: best = (overlap, strategy); break # Ranked by overlap already
+        landings[e] = best; return best
+
+    @staticmethod
+    def takeoffs(e, speed):
+        """(e, speed) for each ground step from takeoff offset e on, down to and including walking off."""
+        while True:
+            yield e, speed
+            if e <= 0: return
+            e -= rr.platform_move(speed); speed += rr.PLATFORM_SPEED_INCREASE
+
+    def score(self, reference, target, speed, e):
+        """((onward, overlap), strategy) for taking off at e; onward means the landing can still reach the platform after target."""
+        overlap, strategy = self.landing(reference, target, speed, e)
+        if not overlap: return (0, 0), None
+        after = next_platform(self.sim, target)
+        onward = after is None or any(self.landing(target, after, s, x)[0] for x, s in itertools.islice(self.takeoffs(overlap, speed), 1, None))
+        return (int(onward), overlap), strategy
+
+    def inputs(self):
+        sim = self.sim; player = sim.player
+        if self.plan:
+            if player.on_ground and self.plan_step > 1: self.plan = None # Landed: plan done
+            else: self.plan_step += 1; return rr.strategy_inputs(self.plan, self.plan_step)
+        if not player.on_ground: return ()
+        reference = standing_platform(sim) or walked_off_platform(sim) # on_ground is last tick's collision: the platform may have scrolled past since
+        target = next_platform(sim, reference)
+        if target is None: return ()
+        speed = sim.current_base_speed + rr.PLATFORM_SPEED_INCREASE # Base speed of the coming step: Simulation ramps before scrolling
+        e = reference.rect.right - player.rect.left; now, strategy = self.score(reference, target, speed, e)
+        if strategy is None or any(self.score(reference, target, s, x)[0] > now for x, s in itertools.islice(self.takeoffs(e, speed), 1, None)): return () # A later takeoff lands better
+        self.plan = strategy; self.plan_step = 1
+        return rr.strategy_inputs(strategy, 1)
+
+BOTS = {"scripted": ScriptedBot, "greedy": GreedyBot}
+
+def standing_platform(sim):
+    player = sim.player
+    for platform_ in sim.platforms:
+        if platform_.rect.top == player.rect.bottom and platform_.rect.right > player.rect.left and platform_.rect.left < player.rect.right: return platform_
+    return None
+
+def walked_off_platform(sim):
+    """The platform the player landed on last tick if it has scrolled out from under them (its right edge now at or
+    behind player.left), else None. Taking off now is the envelope's walk-off at e <= 0."""
+    player = sim.player; found = None
+    for platform_ in sim.platforms:
+        if platform_.rect.left >= player.rect.left: break # Ordered by rect.left
+        if platform_.rect.top == player.rect.bottom and platform_.rect.right <= player.rect.left: found = platform_
+    return found
+
+def next_platform(sim, reference):
+    if reference is None: return None
+    for platform_ in sim.platforms: # Ordered by rect.left
+        if platform_.rect.left >= reference.rect.right: return platform_
+    return None
+
+# --- Worker ---
+def init_worker(cache_dir):
+    rr.ENVELOPE_CACHE_DIR = cache_dir # Envelopes are built once per physics key and shared through this directory
+
+def apply_params(params):
+    for name, value in params.items(): setattr(rr, name, value)
+
+def prepare_config(params):
+    """Builds (or loads) the config's reachability envelope once, before any run needs it. Returns its key."""
+    apply_params(params)
+    return rr.ReachabilityEnvelope.physics_key() if rr.ReachabilityEnvelope.shared() else None
+
+def run_task(task):
+    """One bot life on one seeded level under one config. Returns the result record."""
+    config_index, params, run, seed, bot_name, max_frames, level_generator, reachable = task
+    apply_params(params)
+    sim = rr.Simulation(seed, level_generator=level_generator, reachable=reachable); bot = BOTS[bot_name](sim)
+    envelope = rr.ReachabilityEnvelope.shared() if rr.np is not None else None # Judge of reachable gaps, whatever placed them
+    last = sim.last_platform_generated; spawned = unreachable_gaps = 0; landed_on = None; landed_speed = sim.current_base_speed
+    while sim.frame < max_frames:
+        if sim.step(bot.inputs()): break
+        if sim.last_platform_generated is not last: # Judge each new pair at the speed it was spawned at
+            for platform_ in sim.platforms:
+                if platform_.rect.left <= last.rect.left: continue
+                spawned += 1
+                if envelope and not envelope.is_reachable(last.rect, platform_.rect, sim.current_base_speed): unreachable_gaps += 1
+                last = platform_
+        if sim.player.on_ground: landed_on = standing_platform(sim) or landed_on; landed_speed = sim.current_base_speed
+    death_cause = None
+    if sim.game_over:
+        target = next_platform(sim, landed_on) if landed_on is not None and landed_on.alive() else None
+        death_cause = "unreachable" if envelope and target and not envelope.is_reachable(landed_on.rect, target.rect, landed_speed) else "missed"
+    return {"config": config_index, "params": params, "run": run, "seed": seed, "bot": bot_name, "generator": level_generator,
+            "reachable_levels": sim.envelope is not None, "frames": sim.frame, "score": sim.display_score, "survived": not sim.game_over,
+            "death_cause": death_cause, "platforms": spawned, "unreachable_gaps": unreachable_gaps}
+
+# --- Runner ---
+def sweep(configs, runs, base_seed, bot_name, max_frames, level_generator, reachable, output, workers=None, cache_dir=rr.ENVELOPE_CACHE_DIR):
+    """Runs every (config, run) task across a process pool, writing each result to output as it completes.
+    Returns per-config summaries."""
+    tasks = [(index, params, run, task_seed(base_seed, run), bot_name, max_frames, level_generator, reachable)
+             for index, params in enumerate(configs) for run in range(runs)]
+    summaries = [{"params": params, "runs": 0, "frames": 0, "survived": 0, "unreachable_gaps": 0, "deaths": dict.fromkeys(DEATH_CAUSES, 0)} for params in configs]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cache_dir,)) as pool:
+        keys = set(pool.map(prepare_config, configs)) # One envelope build per distinct physics, not one per racing worker
+        print(f"{len(configs)} configs ({len(keys)} distinct envelopes, cached in {cache_dir}), {len(tasks)} runs, {workers or os.cpu_count()} workers", file=sys.stderr)
+        futures = [pool.submit(run_task, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result(); output.write(json.dumps(result) + "\n"); output.flush()
+            summary = summaries[result["config"]]; summary["runs"] += 1; summary["frames"] += result["frames"]
+            summary["unreachable_gaps"] += result["unreachable_gaps"]; summary["survived"] += result["survived"]
+            if result["death_cause"]: summary["deaths"][result["death_cause"]] += 1
+            if done % 100 == 0 or done == len(tasks): print(f"  {done}/{len(tasks)} runs, {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return summaries
+
+def print_summary(summaries):
+    for summary in summaries:
+        params = " ".join(f"{name}={value}" for name, value in summary["params"].items()) or "(defaults)"
+        runs = max(1, summary["runs"]); deaths = " ".join(f"{cause}={count}" for cause, count in summary["deaths"].items())
+        print(f"{params:<60} mean frames {summary['frames'] / runs:9.1f}  survived {summary['survived']:3d}/{summary['runs']}  {deaths}  unreachable gaps {summary['unreachable_gaps']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sweep Rapid Runner constants with headless bot runs across processes")
+    parser.add_argument("--grid", type=parse_grid_arg, action="append", default=[], metavar="NAME=VALUES",
+                        help="constant to sweep: NAME=v1,v2,... or NAME=start:stop:step (repeat for a cartesian grid)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="seeded runs per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; run i plays the same level under every config")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="greedy", help="greedy: physics-probing jumps; scripted: fixed cadence")
+    parser.add_argument("--max-frames", type=int, default=DEFAULT_MAX_FRAMES, help="physics ticks before a run counts as survived")
+    parser.add_argument("--generator", choices=rr.LEVEL_GENERATORS, default=rr.DEFAULT_LEVEL_GENERATOR, help="level generator")
+    parser.add_argument("--heuristic-levels", action="store_true", help="place platforms with the max-air-time heuristic instead of the reachability envelope")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--cache-dir", metavar="DIR", default=rr.ENVELOPE_CACHE_DIR,
+                        help="where reachability envelopes are cached, one ~320 KB file per distinct physics config (default: .rapidrunner_cache next to the game)")
+    parser.add_argument("--output", metavar="PATH", default="sweep.jsonl", help="JSON lines result file, one record per run (default sweep.jsonl)")
+    args = parser.parse_args()
+
+    configs = expand_grid(args.grid)
+    with open(args.output, "w") as output:
+        summaries = sweep(configs, args.runs, args.seed, args.bot, args.max_frames, args.generator, not args.heuristic_levels, output, args.workers, args.cache_dir)
+    print_summary(summaries)
@@ -0,0 +1,70 @@
+# Rapid Runner tests - headless, under SDL's dummy video driver (see conftest.py)
+#
+#   python -m pytest -q
+
+import gc
+import tracemalloc
+
+import pytest
+
+import rapidrunner as rr
+
+RESTART_CYCLES = 300 # Die/reset cycles traced
+RESTART_FRAMES = 600 # Frame cap per life
+RESTART_MEMORY_LIMIT = 64 * 1024 # Retained bytes allowed over RESTART_CYCLES (about 10 KB is normal)
+REACHABILITY_PLATFORMS = 30 # Seeded platforms proven per generator
+REACHABILITY_SEED = 2024
+
+@pytest.mark.parametrize("level_generator", [name for name in rr.LEVEL_GENERATORS if name != "chunked" or rr.np is not None])
+def test_generated_platforms_are_reachable(level_generator):
+    """Every spawned platform is landable from the one before it with the real physics, from start speed up to
+    ENVELOPE_MAX_SPEED, at the spawn speed and at the speed the player takes off at after the lookahead ramp."""
+    unreachable = rr.unreachable_spawns(REACHABILITY_PLATFORMS, REACHABILITY_SEED, level_generator)
+    if unreachable is None: pytest.skip("the reachability envelope needs NumPy or a cached table")
+    assert unreachable == []
+
+def test_envelope_lookup_without_build_never_builds(monkeypatch, tmp_path):
+    """The game asks for the envelope with build=False at startup: a missing cache is None, not a silent build."""
+    monkeypatch.setattr(rr.ReachabilityEnvelope, "_shared", {})
+    monkeypatch.setattr(rr, "build_envelope_data", lambda key: pytest.fail("built an envelope"))
+    assert rr.ReachabilityEnvelope.shared(str(tmp_path), build=False) is None
+    assert rr.ReachabilityEnvelope._shared == {} # A later build=True call may still build it
+
+LAYOUT_SEGMENTS = 4 # Segments compared, so rows past the first segment spawn at a ramped speed
+LAYOUT_SEED = 7
+
+@pytest.mark.skipif(rr.np is None, reason="the chunked generator needs NumPy")
+def test_layout_segment_matches_spawned_platforms(monkeypatch):
+    """layout_segment, given each row's spawn speed, reproduces the platforms a Simulation spawns, segment after segment."""
+    import sweep_rapidrunner as sw # The greedy bot keeps the player alive while the segments spawn
+    segments = []; spawns = []; iter_level_segments = rr.iter_level_segments; next_platform = rr.LevelStream.next_platform
+    def recording_segments(*args, **kwargs):
+        for segment in iter_level_segments(*args, **kwargs): segments.append(segment); yield segment
+    def recording_next_platform(stream, reference_platform, speed):
+        placed = next_platform(stream, reference_platform, speed); spawns.append((reference_platform.rect.copy(), speed, placed)); return placed
+    monkeypatch.setattr(rr, "iter_level_segments", recording_segments); monkeypatch.setattr(rr.LevelStream, "next_platform", recording_next_platform)
+    sim = rr.Simulation(LAYOUT_SEED, level_generator="chunked"); bot = sw.GreedyBot(sim)
+    while len(spawns) < LAYOUT_SEGMENTS * rr.LEVEL_CHUNK_SIZE: assert not sim.step(bot.inputs()), f"bot fell at frame {sim.frame}"
+    for segment in segments[:LAYOUT_SEGMENTS]:
+        rows = spawns[:len(segment)]; del spawns[:len(segment)]; start = rows[0][0]
+        x, y, width = rr.layout_segment(segment, start.right, start.y, sim.envelope, [speed for _, speed, _ in rows])
+        rights = [start.right] + (x + width).astype(int).tolist()[:-1]
+        laid_out = [(int(left) - right, int(top), int(w)) for left, top, w, right in zip(x, y, width, rights)]
+        assert laid_out == [(placed[0] - reference.right, placed[1], placed[2]) for reference, _, placed in rows] # (gap, top, width) per row
+
+def test_restarts_keep_memory_flat():
+    """Die/reset cycles must not grow memory: reset reuses the player, sprite groups and platform pool."""
+    sim = rr.Simulation(REACHABILITY_SEED); pool_sizes = []
+    def cycle():
+        frame = 0
+        while not sim.step(rr.scripted_inputs(frame)) and frame < RESTART_FRAMES: frame += 1
+        sim.reset(REACHABILITY_SEED); pool_sizes.append(len(sim.platform_pool.free) + len(sim.platforms)) # Every platform ever built
+    for _ in range(20): cycle() # Warm caches and the pool first
+    gc.collect(); tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        for _ in range(RESTART_CYCLES): cycle()
+        gc.collect(); retained = tracemalloc.get_traced_memory()[0] - base
+    finally: tracemalloc.stop()
+    assert retained < RESTART_MEMORY_LIMIT, f"{retained} bytes retained over {RESTART_CYCLES} restarts"
+    assert max(pool_sizes) <= sim.max_platforms and len(sim.platform_pool.free) <= sim.max_platforms
@@ -0,0 +1,53 @@
+# Parameter sweep tests - headless, under SDL's dummy video driver (see conftest.py)
+#
+#   python -m pytest -q
+
+import pytest
+
+import rapidrunner as rr
+import sweep_rapidrunner as sw
+
+GREEDY_SURVIVAL_FRAMES = 6000 # Speed stays well under ENVELOPE_MAX_SPEED, where levels are proven reachable
+GREEDY_SURVIVAL_RUNS = 2 # Seeded levels per generator
+
+@pytest.mark.skipif(rr.np is None, reason="the greedy bot needs NumPy")
+@pytest.mark.parametrize("level_generator", rr.LEVEL_GENERATORS)
+@pytest.mark.parametrize("run", range(GREEDY_SURVIVAL_RUNS))
+def test_greedy_bot_survives_reachable_level(level_generator, run):
+    """Every gap of a reachable level is provably landable, so the greedy bot must never fall."""
+    sim = rr.Simulation(sw.task_seed(0, run), level_generator=level_generator, reachable=True); bot = sw.GreedyBot(sim)
+    while sim.frame < GREEDY_SURVIVAL_FRAMES:
+        assert not sim.step(bot.inputs()), f"greedy bot fell at frame {sim.frame} (speed {sim.current_base_speed:.2f})"
+
+def test_parse_grid_arg_ranges_and_lists():
+    """Ranges are inclusive and lists are typed like the constant they sweep."""
+    assert sw.parse_grid_arg("PLAYER_DASH_SPEED_BONUS=3:4:0.5") == ("PLAYER_DASH_SPEED_BONUS", [3.0, 3.5, 4.0])
+    assert sw.parse_grid_arg("PLAYER_DASH_DURATION_FRAMES=20:22:1") == ("PLAYER_DASH_DURATION_FRAMES", [20, 21, 22])
+    name, values = sw.parse_grid_arg("PLATFORM_MAX_GAP_X=160,200")
+    assert (name, values) == ("PLATFORM_MAX_GAP_X", [160, 200]) and all(type(value) is int for value in values)
+
+@pytest.mark.parametrize("text", ["PLATFORM_MAX_GAP_X=1:2:0", "PLATFORM_MAX_GAP_X=1:2:-1", "PLAYER_DASH_DURATION_FRAMES=20:22:0.5",
+                                  "PLATFORM_MAX_GAP_X=160.5", "PLATFORM_MAX_GAP_X=", "SCREEN_WIDTH=800", "PLATFORM_MAX_GAP_X=1:2"])
+def test_parse_grid_arg_rejects_bad_specs(text):
+    """Zero, negative and fractional-int steps, bad values and unknown names are argparse errors."""
+    with pytest.raises(sw.argparse.ArgumentTypeError): sw.parse_grid_arg(text)
+
+def test_expand_grid_is_a_cartesian_product():
+    """One config per combination; an empty grid is the single default config."""
+    assert sw.expand_grid([]) == [{}]
+    assert sw.expand_grid([("A", [1, 2]), ("B", [3])]) == [{"A": 1, "B": 3}, {"A": 2, "B": 3}]
+
+def test_task_seed_is_deterministic_per_run():
+    """Seeds depend only on the base seed and run, so every config replays the same levels."""
+    seeds = [sw.task_seed(0, run) for run in range(100)]
+    assert seeds == [sw.task_seed(0, run) for run in range(100)] and len(set(seeds)) == len(seeds)
+    assert sw.task_seed(1, 0) != sw.task_seed(0, 0)
+
+def test_run_task_record():
+    """A run's record carries its task fields and a consistent outcome."""
+    seed = sw.task_seed(0, 0); record = sw.run_task((3, {}, 0, seed, "scripted", 200, "scalar", False))
+    assert {key: record[key] for key in ("config", "params", "run", "seed", "bot", "generator", "reachable_levels")} == {
+        "config": 3, "params": {}, "run": 0, "seed": seed, "bot": "scripted", "generator": "scalar", "reachable_levels": False}
+    assert 0 < record["frames"] <= 200 and record["survived"] == (record["frames"] == 200) and record["score"] == record["frames"] // 10
+    assert record["death_cause"] in (None,) + sw.DEATH_CAUSES and (record["death_cause"] is None) == record["survived"]
+    assert record["platforms"] >= 0 and 0 <= record["unreachable_gaps"] <= record["platforms"]